@@ -0,0 +1,73 @@
+import pandas as pd
+
+from kpis import encode_status
+from schemas import month_labels
+
+DIMENSIONS = ["Month", "WarehouseID", "OrderStatus"]
+MEASURES = ["TotalSales", "ShippingCost", "QuantitySold", "ProcessingTime"]
+
+
+def build_cube(df):
+    # One pass over the raw rows: Month x WarehouseID x OrderStatus cells
+    # holding order counts plus sums and sums of squares for every measure.
+    # Every dashboard figure can be derived from these cells.
+    df = encode_status(df)
+    measures = [m for m in MEASURES if m in df.columns]
+    # Compact rows hold float32/int8 measures; sums are accumulated at full width
+    values = df[measures].astype({m: "int64" if pd.api.types.is_integer_dtype(df[m].dtype) else "float64" for m in measures})
+    squares = values.astype("float64").pow(2).add_suffix("_sumsq")
+    frame = pd.concat([df[DIMENSIONS], values.add_suffix("_sum"), squares], axis=1)
+    grouped = frame.groupby(DIMENSIONS, observed=True, sort=True)
+    cube = grouped.sum()
+    cube.insert(0, "count", grouped.size())
+    months = cube.index.levels[DIMENSIONS.index("Month")]
+    if pd.api.types.is_integer_dtype(months.dtype):
+        # Month period codes become "YYYY-MM" labels, as in stored cubes
+        cube.index = cube.index.set_levels(month_labels(months), level="Month")
+    return cube
+
+
+def merge_cubes(*cubes):
+    # Counts, sums and sums of squares are all additive, so the cube for a
+    # delta can be folded into the running cube without touching old rows
+    cubes = [c for c in cubes if c is not None and not c.empty]
+    if not cubes:
+        return None
+    if len(cubes) == 1:
+        return cubes[0]
+    return pd.concat(cubes).groupby(level=DIMENSIONS, observed=True, sort=True).sum()
+
+
+def rollup(cube, by=None):
+    # Collapse the cube onto the requested dimensions; by=None gives grand totals
+    if by is None:
+        return cube.sum()
+    return cube.groupby(level=by, observed=True, sort=True).sum()
+
+
+def mean(rolled, measure):
+    return rolled[f"{measure}_sum"] / rolled["count"]
+
+
+def std(rolled, measure):
+    # Sample standard deviation from count, sum and sum of squares
+    n = rolled["count"]
+    total = rolled[f"{measure}_sum"]
+    variance = (rolled[f"{measure}_sumsq"] - total ** 2 / n) / (n - 1)
+    return variance.clip(lower=0) ** 0.5
+
+
+def status_counts(cube, by=None):
+    # Order counts per OrderStatus, one column per status, zero-filled
+    if by is None:
+        return rollup(cube, "OrderStatus")["count"]
+    levels = [by] if isinstance(by, str) else list(by)
+    counts = rollup(cube, levels + ["OrderStatus"])["count"]
+    return counts.unstack("OrderStatus", fill_value=0)
+
+
+def monthly_totals(cube, measures=("TotalSales", "ShippingCost", "QuantitySold")):
+    # The Monthly Metrics table: one row per Month with each measure's total
+    totals = rollup(cube, "Month")[[f"{m}_sum" for m in measures]]
+    totals.columns = list(measures)
+    return totals.reset_index()
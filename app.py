@@ -1,29 +1,106 @@
+import time
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from data_loader import load_fact_sales, source_version
+from aggregates import build_cube, rollup, mean, status_counts, monthly_totals
+from ingest import ingest, seed_store, sync_seed, store_exists, store_version, load_store, load_store_cube
+from sales_index import SalesIndex
+from baseline_forecast import METHODS, monthly_matrix, forecast_all, backtest, forecast_frame
+from exports import EXPORT_FORMATS, view_version as export_view_version, export_file, cached_export_path
+from chart_payload import downsample, bin_counts, page_count, page as table_page, log_payload, PAGE_SIZE
+from instrumentation import start_run, set_page, checkpoint, finish_run
+from shared_store import store as shared_store, shared_frame, session_lease
 
-# Load Data
+# Per-stage timings for this rerun (only with DASHBOARD_PROFILE=1 or ?debug=1);
+# chart payload sizes go to the server log with DASHBOARD_LOG_PAYLOAD=1
+start_run("app.py")
+
+# Load Data (parsed once into a Parquet cache with Date and Month precomputed).
+# Once daily drops have been appended, the partitioned store is the source.
 file_path = "order_fulfillment_dashboard_updated.xlsx"
-xls = pd.ExcelFile(file_path)
-fact_sales_df = pd.read_excel(xls, sheet_name="FactSales")
 
-# Ensure Date column is in datetime format
-fact_sales_df["Date"] = pd.to_datetime(fact_sales_df["Date"], errors='coerce')
+# Replacing the workbook still refreshes the dashboard once orders have been
+# appended: the store is rebuilt from it with the appended drops replayed
+if sync_seed(file_path):
+    st.sidebar.info("The workbook changed since orders were appended; the store was rebuilt from it and the appended orders re-applied.")
+
+# The Date-sorted FactSales frame, its cube and its index live in the shared
+# store: one read-only copy per data version for every session in the process,
+# with the frame memory-mapped from an Arrow file that worker processes share
+if store_exists():
+    data_version, load_source, load_cube = store_version(), load_store, load_store_cube
+else:
+    data_version, load_source = source_version(file_path), lambda: load_fact_sales(file_path)
+    load_cube = lambda: build_cube(fact_sales_df)
+
+fact_sales_df = shared_frame("fact_sales", data_version,
+                             lambda: load_source().sort_values("Date", kind="stable", ignore_index=True))
+checkpoint("load", "FactSales", len(fact_sales_df))
+sales_cube = shared_store.get(("cube", data_version), load_cube)
+checkpoint("aggregate", "cube", len(fact_sales_df))
+
+# Date-sorted index with per-warehouse row positions; each session holds a
+# lease on it so the entry stays resident while anyone is viewing this version
+sales_index = session_lease("sales_index", ("sales_index", data_version), lambda: SalesIndex(fact_sales_df))
+checkpoint("aggregate", "sales index", len(fact_sales_df))
+
+# Long tables are shown a page at a time so only PAGE_SIZE rows are sent to the browser
+def show_table(df, key):
+    if len(df) <= PAGE_SIZE:
+        st.dataframe(df)
+        return
+    pages = page_count(df)
+    page_number = st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, value=1, key=key)
+    st.dataframe(table_page(df, page_number))
 
-# Drop rows with missing dates to avoid KeyError
-fact_sales_df = fact_sales_df.dropna(subset=["Date"])
+def show_chart(name, fig, rows, full_fig=None, rows_plotted=None, **kwargs):
+    # Every chart goes through here so payload logging covers all of them;
+    # charts drawn from their full data log the same size before and after
+    log_payload(name, fig, full_fig, rows, rows if rows_plotted is None else rows_plotted)
+    st.plotly_chart(fig, **kwargs)
 
 # Define color palette
 colors = ["#00A6FB", "#0582CA", "#006494", "#003554", "#051923"]
 
-# Extract Month from Date
-fact_sales_df["Month"] = fact_sales_df["Date"].dt.to_period("M").astype(str)
-
 # Sidebar Navigation
 st.sidebar.title("📊 Order Fulfillment Dashboard by Karen Bello")
 st.sidebar.markdown("### Navigation")
 page = st.sidebar.radio("Select a Page:", ["Overview", "Sales Analysis", "Order Fulfillment", "Monthly Metrics", "KPI Analysis", "Moving Average", "Forecasting", "Download Reports"])
+set_page(page)
+
+# Global filters: every page below works on the filtered rows and their cube
+st.sidebar.markdown("### Filters")
+min_date, max_date = sales_index.date_range
+date_range = st.sidebar.date_input("Date Range:", value=(min_date, max_date), min_value=min_date, max_value=max_date)
+selected_warehouses = st.sidebar.multiselect("Warehouse:", sales_index.warehouses, default=sales_index.warehouses)
+selected_statuses = st.sidebar.multiselect("Order Status:", sales_index.statuses, default=sales_index.statuses)
+
+start_date, end_date = date_range if len(date_range) == 2 else (date_range[0], max_date)
+if (start_date, end_date) != (min_date, max_date) or selected_warehouses != sales_index.warehouses or selected_statuses != sales_index.statuses:
+    fact_sales_df, sales_cube = sales_index.slice(start_date, end_date, selected_warehouses, selected_statuses)
+    if fact_sales_df.empty:
+        st.warning("No orders match the selected filters.")
+        finish_run()
+        st.stop()
+    checkpoint("transform", "filter", len(fact_sales_df))
+view_version = export_view_version(data_version, start_date, end_date, selected_warehouses, selected_statuses)
+
+# Append new orders: only unseen SalesIDs are written, aggregates update incrementally
+with st.sidebar.expander("Append New Orders"):
+    new_orders = st.file_uploader("Upload CSV or Excel drop", type=["csv", "xlsx"])
+    if new_orders is not None and st.button("Append Orders"):
+        try:
+            seed_store(file_path)
+            st.session_state["ingest_summary"] = ingest(new_orders)
+        except (ValueError, TimeoutError) as e:
+            st.error(f"Error appending orders: {e}")
+        else:
+            st.rerun()
+    if "ingest_summary" in st.session_state:
+        summary = st.session_state.pop("ingest_summary")
+        st.success(f"Appended {summary['appended']} orders, skipped {summary['duplicates']} duplicate SalesIDs.")
 
 # Custom CSS for better UI
 st.markdown("""
@@ -54,14 +131,17 @@ st.markdown("""
     }
     </style>
     """, unsafe_allow_html=True)
+checkpoint("render", "sidebar")
 
 if page == "Overview":
     st.title("📈 Dashboard Overview")
     
     # Metrics
-    total_sales = fact_sales_df["TotalSales"].sum()
-    total_orders = fact_sales_df.shape[0]
-    avg_processing_time = fact_sales_df["ProcessingTime"].mean()
+    totals = rollup(sales_cube)
+    total_sales = totals["TotalSales_sum"]
+    total_orders = int(totals["count"])
+    avg_processing_time = mean(totals, "ProcessingTime")
+    checkpoint("aggregate", "overview totals")
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -73,21 +153,27 @@ if page == "Overview":
     
     # Order Status Distribution
     st.markdown("### Order Status Distribution")
-    order_status_counts = fact_sales_df["OrderStatus"].value_counts()
+    order_status_counts = status_counts(sales_cube).sort_values(ascending=False)
+    checkpoint("aggregate", "status counts")
     fig = px.pie(order_status_counts, values=order_status_counts.values, names=order_status_counts.index,
                  title="Order Status Distribution", color_discrete_sequence=colors)
-    st.plotly_chart(fig)
+    show_chart("status_pie", fig, len(order_status_counts))
+    checkpoint("render", "status pie")
     
     # Monthly Order and Completion Analysis
     st.markdown("### Monthly Order and Completion Analysis")
-    monthly_orders = fact_sales_df.groupby("Month").agg({"SalesID": "count", "OrderStatus": lambda x: (x == "Completed").sum()}).reset_index()
-    monthly_orders.columns = ["Month", "Total Orders", "Completed Orders"]
+    monthly_status = status_counts(sales_cube, "Month")
+    monthly_orders = pd.DataFrame({
+        "Total Orders": monthly_status.sum(axis=1),
+        "Completed Orders": monthly_status.get("Completed", 0)}).reset_index()
+    checkpoint("aggregate", "monthly orders")
     
     fig_bar = px.bar(monthly_orders, x="Month", y=["Completed Orders", "Total Orders"],
                      title="Monthly Total Orders and Completed Orders", 
                      color_discrete_sequence=[colors[3], colors[0]],
                      labels={"value": "Count", "variable": "Order Type"})
-    st.plotly_chart(fig_bar)
+    show_chart("monthly_orders", fig_bar, len(monthly_orders))
+    checkpoint("render", "monthly orders chart")
 
 elif page == "Sales Analysis":
     st.title("📊 Sales Trends")
@@ -95,52 +181,66 @@ elif page == "Sales Analysis":
     # Sales Trend Over Time
     st.markdown("### Sales Trend Over Time")
     sales_trend = fact_sales_df.groupby("Date")["TotalSales"].sum().reset_index()
-    fig = px.line(sales_trend, x="Date", y="TotalSales", title="Sales Trend Over Time", color_discrete_sequence=[colors[1]])
-    st.plotly_chart(fig)
+    sales_trend_plot = downsample(sales_trend, "Date", "TotalSales")
+    checkpoint("aggregate", "daily sales trend", len(fact_sales_df))
+    make_fig = lambda data: px.line(data, x="Date", y="TotalSales", title="Sales Trend Over Time", color_discrete_sequence=[colors[1]])
+    fig = make_fig(sales_trend_plot)
+    show_chart("sales_trend", fig, len(sales_trend), lambda: make_fig(sales_trend), len(sales_trend_plot))
+    checkpoint("render", "sales trend chart", len(sales_trend_plot))
 
 elif page == "Order Fulfillment":
     st.title("📦 Order Fulfillment Analysis")
     
     # Processing Time Distribution
     st.markdown("### Processing Time Distribution")
-    processing_time_dist = px.histogram(fact_sales_df, x="ProcessingTime", nbins=10, title="Processing Time Distribution", color_discrete_sequence=[colors[2]])
-    st.plotly_chart(processing_time_dist)
+    processing_time_bins = bin_counts(fact_sales_df["ProcessingTime"], nbins=10)
+    checkpoint("aggregate", "processing time bins", len(fact_sales_df))
+    processing_time_dist = px.bar(processing_time_bins, x="ProcessingTime", y="count", title="Processing Time Distribution", color_discrete_sequence=[colors[2]])
+    show_chart("processing_time_dist", processing_time_dist, len(fact_sales_df),
+               lambda: px.histogram(fact_sales_df, x="ProcessingTime", nbins=10), len(processing_time_bins))
+    checkpoint("render", "processing time chart")
 
 elif page == "Monthly Metrics":
     st.title("📊 Monthly Metrics")
     
     # Monthly Metrics Table
     st.markdown("### Monthly Metrics Table")
-    monthly_metrics = fact_sales_df.groupby("Month").agg({
-        "TotalSales": "sum", 
-        "ShippingCost": "sum", 
-        "QuantitySold": "sum"}).reset_index()
+    monthly_metrics = monthly_totals(sales_cube)
+    checkpoint("aggregate", "monthly metrics")
     
-    st.dataframe(monthly_metrics)
+    show_table(monthly_metrics, "monthly_metrics_page")
     
     # Monthly Total Sales
     st.markdown("### Monthly Total Sales")
     fig_sales = px.line(monthly_metrics, x="Month", y="TotalSales", title="Monthly Total Sales", color_discrete_sequence=[colors[0]])
-    st.plotly_chart(fig_sales)
+    show_chart("monthly_sales", fig_sales, len(monthly_metrics))
     
     # Monthly Shipping Cost
     st.markdown("### Monthly Shipping Cost")
     fig_shipping = px.line(monthly_metrics, x="Month", y="ShippingCost", title="Monthly Shipping Cost", color_discrete_sequence=[colors[1]])
-    st.plotly_chart(fig_shipping)
+    show_chart("monthly_shipping", fig_shipping, len(monthly_metrics))
     
     # Monthly Quantity Sold
     st.markdown("### Monthly Quantity Sold")
     fig_quantity = px.line(monthly_metrics, x="Month", y="QuantitySold", title="Monthly Quantity Sold", color_discrete_sequence=[colors[2]])
-    st.plotly_chart(fig_quantity)
+    show_chart("monthly_quantity", fig_quantity, len(monthly_metrics))
+    checkpoint("render", "monthly metrics table and charts")
 
 elif page == "KPI Analysis":
     st.title("📊 KPI Analysis")
     
     # KPIs
-    total_orders = fact_sales_df.shape[0]
-    total_sales = fact_sales_df["TotalSales"].sum()
-    avg_processing_time = fact_sales_df["ProcessingTime"].mean()
-    cancellation_rate = (fact_sales_df["OrderStatus"].value_counts().get("Cancelled", 0) / total_orders) * 100
+    totals = rollup(sales_cube)
+    total_orders = int(totals["count"])
+    total_sales = totals["TotalSales_sum"]
+    avg_processing_time = mean(totals, "ProcessingTime")
+    cancellation_rate = (status_counts(sales_cube).get("Cancelled", 0) / total_orders) * 100
+    warehouse_totals = rollup(sales_cube, "WarehouseID")
+    warehouse_processing = mean(warehouse_totals, "ProcessingTime").rename("ProcessingTime").reset_index()
+    warehouse_status = status_counts(sales_cube, "WarehouseID")
+    warehouse_cancellations = (warehouse_status.get("Cancelled", 0) / warehouse_status.sum(axis=1) * 100).reset_index()
+    warehouse_cancellations.columns = ["WarehouseID", "Cancellation Rate"]
+    checkpoint("aggregate", "KPIs by warehouse")
     
     kpi_col1, kpi_col2 = st.columns(2)
     with kpi_col1:
@@ -150,56 +250,101 @@ elif page == "KPI Analysis":
     
     # Processing Time by Warehouse
     st.markdown("### Processing Time by Warehouse")
-    warehouse_processing = fact_sales_df.groupby("WarehouseID")["ProcessingTime"].mean().reset_index()
     if not warehouse_processing.empty:
         fig_processing = px.bar(warehouse_processing, x="WarehouseID", y="ProcessingTime", 
                                 title="Avg Processing Time by Warehouse", color_discrete_sequence=[colors[1]])
-        st.plotly_chart(fig_processing)
+        show_chart("warehouse_processing", fig_processing, len(warehouse_processing))
     else:
         st.write("No data available for Processing Time by Warehouse.")
     
     # Cancellation Rate by Warehouse
     st.markdown("### Cancellation Rate by Warehouse")
-    warehouse_cancellations = fact_sales_df.groupby("WarehouseID")["OrderStatus"].apply(lambda x: (x == "Cancelled").mean() * 100).reset_index()
-    warehouse_cancellations.columns = ["WarehouseID", "Cancellation Rate"]
     if not warehouse_cancellations.empty:
         fig_cancellations = px.bar(warehouse_cancellations, x="WarehouseID", y="Cancellation Rate", 
                                    title="Avg Cancellation Rate by Warehouse", color_discrete_sequence=[colors[2]])
-        st.plotly_chart(fig_cancellations)
+        show_chart("warehouse_cancellations", fig_cancellations, len(warehouse_cancellations))
     else:
         st.write("No data available for Cancellation Rate by Warehouse.")
+    checkpoint("render", "KPI charts")
 
 elif page == "Moving Average":
     st.title("📊 Moving Average for Next 3 Months")
     
-    # Moving Average Calculation
-    sales_trend = fact_sales_df.groupby("Date")["TotalSales"].sum().reset_index()
+    # Moving Average Calculation over true monthly buckets
+    warehouses, months, monthly_sales = monthly_matrix(sales_cube)
+    sales_trend = pd.DataFrame({"Date": months.to_timestamp(), "TotalSales": monthly_sales.sum(axis=0)})
     sales_trend["Moving_Avg_3M"] = sales_trend["TotalSales"].rolling(window=3, min_periods=1).mean()
+    checkpoint("aggregate", "moving average")
     
     # Display the data in a matrix (table) format
     st.markdown("### Moving Average Data")
-    st.dataframe(sales_trend)
+    show_table(sales_trend, "moving_average_page")
     
     # Moving Average Chart
     st.markdown("### Moving Average (3 Months) vs. Total Sales")
-    fig = px.line(sales_trend, x="Date", y=["TotalSales", "Moving_Avg_3M"], 
-                  title="Moving Average (3 Months) vs. Total Sales", 
-                  labels={"value": "Sales", "variable": "Metric"}, 
-                  color_discrete_sequence=[colors[1], colors[3]])
-    st.plotly_chart(fig, use_container_width=True)
+    sales_trend_plot = downsample(sales_trend, "Date", ["TotalSales", "Moving_Avg_3M"])
+    make_fig = lambda data: px.line(data, x="Date", y=["TotalSales", "Moving_Avg_3M"], 
+                                    title="Moving Average (3 Months) vs. Total Sales", 
+                                    labels={"value": "Sales", "variable": "Metric"}, 
+                                    color_discrete_sequence=[colors[1], colors[3]])
+    fig = make_fig(sales_trend_plot)
+    show_chart("moving_average", fig, len(sales_trend), lambda: make_fig(sales_trend), len(sales_trend_plot),
+               use_container_width=True)
+    checkpoint("render", "moving average table and chart")
     
     # Download Button for the Moving Average Data
     st.markdown("### Download Moving Average Data")
     csv_data = sales_trend.to_csv(index=False).encode('utf-8')
+    checkpoint("export", "moving average CSV", len(sales_trend))
     st.download_button(label="Download CSV", data=csv_data, file_name="moving_average_data.csv", mime="text/csv")
 
 elif page == "Forecasting":
     st.title("🔮 Sales Forecast")
-    st.write("Coming Soon: Predicting future sales using AI models.")
+    
+    measure = st.selectbox("Metric:", ["TotalSales", "QuantitySold", "ShippingCost"])
+    horizon = st.slider("Months to Forecast:", min_value=1, max_value=6, value=3)
+    method = st.radio("Method:", METHODS, horizontal=True)
+    
+    # Every warehouse is forecast at once from the warehouse x month matrix
+    start = time.perf_counter()
+    warehouses, months, history = monthly_matrix(sales_cube, measure)
+    forecasts = forecast_all(history, horizon)
+    errors = backtest(history, horizon)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    checkpoint("aggregate", "baseline forecasts", len(warehouses))
+    st.caption(f"Forecast {len(warehouses)} warehouses with {len(METHODS)} methods and backtest in {elapsed_ms:.1f} ms")
+    
+    # Fleet total: history vs. forecast
+    st.markdown("### Total Forecast")
+    future = pd.period_range(months[-1] + 1, periods=horizon, freq="M")
+    fleet = pd.concat([
+        pd.DataFrame({"Month": months.to_timestamp(), measure: history.sum(axis=0), "Series": "Actual"}),
+        pd.DataFrame({"Month": future.to_timestamp(), measure: forecasts[method].sum(axis=0), "Series": method}),
+    ])
+    fig = px.line(fleet, x="Month", y=measure, color="Series", title=f"{measure}: Actual vs. {method}",
+                  color_discrete_sequence=[colors[1], colors[3]])
+    show_chart("forecast", fig, len(fleet))
+    
+    st.markdown("### Forecast by Warehouse")
+    show_table(forecast_frame(warehouses, months, forecasts[method]), "forecast_page")
+    
+    st.markdown("### Backtest Error by Method")
+    st.dataframe(errors)
+    checkpoint("render", "forecast chart and tables")
 
 elif page == "Download Reports":
     st.title("📥 Download Reports")
-    csv_data = fact_sales_df.to_csv(index=False).encode('utf-8')
-    st.download_button(label="Download CSV", data=csv_data, file_name="sales_report.csv", mime="text/csv")
+    
+    # Files are only generated on request and cached per data version, filters and format
+    export_format = st.selectbox("Format:", list(EXPORT_FORMATS))
+    extension, mime = EXPORT_FORMATS[export_format]
+    report_path = cached_export_path("sales_report", view_version, export_format)
+    if report_path is None and st.button("Prepare Report"):
+        report_path = export_file(fact_sales_df, "sales_report", view_version, export_format)
+        checkpoint("export", f"sales report ({export_format})", len(fact_sales_df))
+    if report_path is not None:
+        with open(report_path, "rb") as f:
+            st.download_button(label=f"Download {export_format}", data=f, file_name=f"sales_report{extension}", mime=mime)
 
-st.sidebar.write("Powered by Data Science 🚀")
\ No newline at end of file
+st.sidebar.write("Powered by Data Science 🚀")
+finish_run()
\ No newline at end of file
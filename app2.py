@@ -1,28 +1,17 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from statsmodels.tsa.arima.model import ARIMA
-from prophet import Prophet
-import io
+from forecasting import monthly_series, forecast_many, forecast_excel
+from exports import download_on_demand
 
 def load_data(file):
     data = pd.read_csv(file, parse_dates=['Date'], index_col='Date')
     return data
 
-def forecast_sales(data, periods, model_type='ARIMA'):
-    data = data.resample('M').sum()
-    if model_type == 'ARIMA':
-        model = ARIMA(data, order=(5,1,0))
-        model_fit = model.fit()
-        forecast = model_fit.forecast(steps=periods)
-    else:
-        df = data.reset_index().rename(columns={'Date': 'ds', 'Sales': 'y'})
-        model = Prophet()
-        model.fit(df)
-        future = model.make_future_dataframe(periods=periods, freq='M')
-        forecast = model.predict(future)[['ds', 'yhat']].tail(periods)
-        forecast.set_index('ds', inplace=True)
-    return forecast
+def forecast_sales(data, periods, model_type='ARIMA', group_col=None, value_col='Sales'):
+    # Fitted models are cached on disk by series hash and model type; one
+    # series per WarehouseID/Carrier when group_col is set, fit in parallel
+    series_by_key = monthly_series(data, value_col, group_col)
+    return forecast_many(series_by_key, periods, model_type)
 
 def main():
     st.title('E-commerce Sales Forecasting App')
@@ -36,21 +25,23 @@ def main():
         
         periods = st.selectbox("Select Forecast Period:", [6, 12])
         model_type = st.radio("Select Model:", ['ARIMA', 'Prophet'])
+        group_options = ['All'] + [c for c in ['WarehouseID', 'Carrier'] if c in data.columns]
+        group_by = st.selectbox("Forecast Per:", group_options)
+        group_col = None if group_by == 'All' else group_by
         
+        forecast_key = (getattr(uploaded_file, 'file_id', uploaded_file.name), periods, model_type, group_col)
         if st.button("Generate Forecast"):
-            forecast = forecast_sales(data, periods, model_type)
+            st.session_state['forecast'] = (forecast_key, forecast_sales(data, periods, model_type, group_col))
+        
+        stored = st.session_state.get('forecast')
+        if stored is not None and stored[0] == forecast_key:
+            forecast = stored[1]
             st.write("### Forecasted Sales")
             st.line_chart(forecast)
             
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                forecast.to_excel(writer, sheet_name='Forecast')
-            output.seek(0)
-            
-            st.download_button(label="Download Forecast Report",
-                               data=output,
-                               file_name="forecast_report.xlsx",
-                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            # The Excel report is only written when requested
+            download_on_demand("Forecast Report", forecast_key, lambda: forecast_excel(forecast),
+                               "forecast_report.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,7 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import io
-
-def load_data(file):
-    df = pd.read_csv(file)
-    return df
+from shipments import load_shipments, write_shipments_excel, add_cost_per_mile
+from exports import download_on_demand
 
 def main():
     st.title("SmartWay Logistics Management")
@@ -13,32 +9,26 @@ def main():
     
     uploaded_file = st.file_uploader("Upload CSV file (Shipments & Orders)", type=["csv"])
     if uploaded_file is not None:
-        df = load_data(uploaded_file)
+        summary = load_shipments(uploaded_file)
         st.write("### Uploaded Data Preview:")
-        st.write(df.head())
+        st.write(summary.preview)
         
         # Shipment status analysis
-        if 'Status' in df.columns:
-            status_counts = df['Status'].value_counts()
+        status_counts = summary.status_counts()
+        if not status_counts.empty:
             fig_status = px.pie(status_counts, names=status_counts.index, values=status_counts.values, title="Shipment Status Distribution")
             st.plotly_chart(fig_status)
         
         # Cost analysis
-        if 'Cost' in df.columns and 'Distance' in df.columns:
-            df['Cost per Mile'] = df['Cost'] / df['Distance']
+        cost_per_mile = summary.route_cost_per_mile()
+        if not cost_per_mile.empty:
             st.write("### Cost Analysis")
-            st.bar_chart(df.groupby('Route')['Cost per Mile'].mean())
-        
-        # Export updated data
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Updated_Data', index=False)
-        output.seek(0)
+            st.bar_chart(cost_per_mile)
         
-        st.download_button(label="Download Updated Data",
-                           data=output,
-                           file_name="smartway_data.xlsx",
-                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        # Export updated data on request (rows are streamed into the workbook chunk by chunk)
+        download_on_demand("Updated Data", getattr(uploaded_file, 'file_id', uploaded_file.name),
+                           lambda: write_shipments_excel(uploaded_file, 'Updated_Data', transform=add_cost_per_mile).getvalue(),
+                           "smartway_data.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
 if __name__ == "__main__":
     main()
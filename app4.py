@@ -1,70 +1,62 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import io
-from fpdf import FPDF
-
-def load_data(file):
-    df = pd.read_excel(file) if file.name.endswith('.xlsx') else pd.read_csv(file)
-    df['TKM'] = (df['Actual Weight (kgs)'] * df['Transport Distance (km)']) / 1000
-    df['TON-MILE'] = df['TKM'] * 0.6213
-    df = df.round({'TKM': 2, 'TON-MILE': 2})
-    return df
-
-def generate_pdf(pivot_table):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="Smartway Calculator Report", ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(40, 10, 'Carrier')
-    pdf.cell(40, 10, 'TON-MILE')
-    pdf.cell(40, 10, 'TKM')
-    pdf.ln(10)
-    pdf.set_font("Arial", size=12)
-    
-    for _, row in pivot_table.iterrows():
-        pdf.cell(40, 10, row['Carrier'])
-        pdf.cell(40, 10, str(row['TON-MILE']))
-        pdf.cell(40, 10, str(row['TKM']))
-        pdf.ln(10)
-    
-    pdf_output = io.BytesIO()
-    pdf.output(pdf_output, dest='S')
-    pdf_output.seek(0)
-    return pdf_output.getvalue()
+from shipments import load_shipments
+from exports import download_on_demand
+from smartway import read_factor_table, smartway_report, report_excel, report_pdf
+from instrumentation import start_run, checkpoint, finish_run
 
 def main():
+    # Per-stage timings for this rerun (only with DASHBOARD_PROFILE=1 or ?debug=1)
+    start_run("app4.py")
     st.title("SmartWay Logistics Management")
     st.write("Upload shipment data to analyze logistics efficiency.")
     
     uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx"])
     if uploaded_file is not None:
-        df = load_data(uploaded_file)
+        summary = load_shipments(uploaded_file)
+        checkpoint("load", "shipments", summary.rows)
         st.write("### Data Preview:")
-        st.dataframe(df.head())
+        st.dataframe(summary.preview)
         
-        carrier_list = ['All'] + df['Carrier'].unique().tolist()
+        carrier_totals = summary.carrier_totals()
+        carrier_list = ['All'] + carrier_totals['Carrier'].tolist()
         selected_carrier = st.selectbox("Filter by Carrier:", carrier_list)
-        filtered_df = df if selected_carrier == 'All' else df[df['Carrier'] == selected_carrier]
-        
-        pivot_table = filtered_df.groupby('Carrier').agg({'TON-MILE': 'sum', 'TKM': 'sum'}).reset_index()
+        pivot_table = carrier_totals if selected_carrier == 'All' else carrier_totals[carrier_totals['Carrier'] == selected_carrier]
+        checkpoint("aggregate", "carrier totals", summary.rows)
         st.write("### Aggregated Data")
         st.dataframe(pivot_table)
         
         fig = px.bar(pivot_table, x='Carrier', y=['TON-MILE', 'TKM'], title='TON-MILE & TKM by Carrier')
         st.plotly_chart(fig)
+        checkpoint("render", "carrier table and chart")
         
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            pivot_table.to_excel(writer, sheet_name='Aggregated Data', index=False)
-        output.seek(0)
-        
-        st.download_button(label="Download Excel Report", data=output, file_name="smartway_report.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        # SmartWay rollups: emissions factors joined per carrier (mode defaults otherwise)
+        st.write("### SmartWay Emissions")
+        factor_file = st.file_uploader("Upload carrier emissions factors (optional)", type=["csv", "xlsx"])
+        factors = None
+        if factor_file is not None:
+            try:
+                factors = read_factor_table(factor_file)
+            except ValueError as e:
+                st.error(f"Error reading factor table: {e}")
+        rollups = smartway_report(summary, factors) or {}
+        checkpoint("aggregate", "SmartWay rollups", summary.rows)
+        for level, tab in zip(rollups, st.tabs(list(rollups))):
+            with tab:
+                st.dataframe(rollups[level])
+        if "Carrier" in rollups:
+            fig_co2 = px.bar(rollups["Carrier"], x='Carrier', y='CO2 (kg)', title='CO2 Emissions by Carrier')
+            st.plotly_chart(fig_co2)
+        checkpoint("render", "SmartWay tables and chart")
         
-        pdf_output = generate_pdf(pivot_table)
-        st.download_button(label="Download PDF Report", data=pdf_output, file_name="smartway_report.pdf", mime="application/pdf")
+        # Reports are built only when requested, once per upload, factor table and carrier filter
+        report_key = (getattr(uploaded_file, 'file_id', uploaded_file.name),
+                      getattr(factor_file, 'file_id', None), selected_carrier)
+        download_on_demand("Excel Report", report_key, lambda: report_excel(pivot_table, rollups),
+                           "smartway_report.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        download_on_demand("PDF Report", report_key, lambda: report_pdf(pivot_table, rollups),
+                           "smartway_report.pdf", "application/pdf")
+    finish_run()
 
 if __name__ == "__main__":
     main()
@@ -1,81 +1,13 @@
+import zipfile
 import streamlit as st
 import pandas as pd
-import pdfplumber
-import io
-import openpyxl
-from openpyxl.utils import get_column_letter
-from fpdf import FPDF
-
-def extract_invoice_details(pdf_file):
-    with pdfplumber.open(pdf_file) as pdf:
-        text = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    
-    invoice_data = {
-        "Sales Order No": "", "Date": "", "Bill To": "", "Ship To": "",
-        "Items": [], "Importer of Record": "", "Special Instructions": "", "Incoterms": "", "Mode": "", "Freight Forwarder": "", "Total Weight": ""
-    }
-    
-    return invoice_data
-
-def generate_invoice_excel(invoice_data):
-    template_path = "invoice_template2.xlsx"  # Updated pre-defined invoice template
-    output = io.BytesIO()
-    
-    wb = openpyxl.load_workbook(template_path)
-    ws = wb.active
-    
-    # Insert header details
-    ws["I6"].value = invoice_data["Sales Order No"]
-    ws["I7"].value = invoice_data["Date"]
-    ws["B10"].value = invoice_data["Bill To"]
-    ws["B14"].value = invoice_data["Ship To"]
-    ws["B17"].value = invoice_data["Importer of Record"]
-    ws["B25"].value = invoice_data["Special Instructions"]
-    ws["B35"].value = invoice_data["Incoterms"]
-    ws["B38"].value = invoice_data["Total Weight"]
-    ws["B42"].value = invoice_data["Mode"]
-    ws["B44"].value = invoice_data["Freight Forwarder"]
-    
-    # Insert items dynamically
-    start_row = 30
-    for index, item in enumerate(invoice_data["Items"]):
-        row = start_row + index  # Place each item in the next available row
-        ws[f"B{row}"].value = item["Description"]
-        ws[f"G{row}"].value = item["Quantity"]
-        ws[f"H{row}"].value = item["Unit Price"]
-        ws[f"I{row}"].value = item["Total Price"]
-    
-    wb.save(output)
-    output.seek(0)
-    return output
-
-def generate_invoice_pdf(invoice_data):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", style='B', size=14)
-    pdf.cell(200, 10, "Commercial Invoice", ln=True, align='C')
-    pdf.ln(10)
-    pdf.set_font("Arial", size=12)
-    
-    for key, value in invoice_data.items():
-        if key != "Items":
-            pdf.cell(200, 10, f"{key}: {value}", ln=True)
-    
-    pdf.ln(10)
-    pdf.cell(200, 10, "Items:", ln=True)
-    for item in invoice_data["Items"]:
-        pdf.cell(200, 10, f"{item['Description']} - Qty: {item['Quantity']} - Unit Price: {item['Unit Price']} - Total: {item['Total Price']}", ln=True)
-    
-    output = io.BytesIO()
-    pdf.output(output, 'S')
-    output.seek(0)
-    return output.read()
+from invoices import extract_invoice_details, generate_invoice_excel, generate_invoice_pdf
+from invoice_batch import load_batch, render_batch
 
 # Streamlit App Interface
 st.title("Commercial Invoice Generator")
 
-option = st.radio("Choose Input Method:", ["Upload PDF", "Manual Entry"])
+option = st.radio("Choose Input Method:", ["Upload PDF", "Manual Entry", "Batch Upload"])
 
 if option == "Upload PDF":
     uploaded_file = st.file_uploader("Upload Sales Order (PDF)", type=["pdf"])
@@ -133,3 +65,19 @@ elif option == "Manual Entry":
         st.download_button("Download Invoice (Excel)", data=excel_file.getvalue(), file_name="invoice.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         st.download_button("Download Invoice (PDF)", data=pdf_file, file_name="invoice.pdf", mime="application/pdf")
 
+elif option == "Batch Upload":
+    st.write("Upload one row per line item (header fields repeated), an Excel file with Orders and Items sheets, or separate orders and items files joined on Sales Order No.")
+    orders_file = st.file_uploader("Upload Sales Orders (CSV or Excel)", type=["csv", "xlsx"])
+    items_file = st.file_uploader("Upload Line Items (optional)", type=["csv", "xlsx"])
+    if orders_file is not None and st.button("Generate Invoices"):
+        try:
+            invoices = load_batch(orders_file, items_file)
+        except (ValueError, zipfile.BadZipFile) as e:
+            st.error(f"Error reading batch: {e}")
+        else:
+            with st.spinner(f"Rendering {len(invoices)} invoices..."):
+                archive, report = render_batch(invoices)
+            failed = (report["Status"] == "Failed").sum()
+            st.write(f"Rendered {len(report) - failed} of {len(report)} invoices in {report.attrs['wall_seconds']:.1f} s ({failed} failed).")
+            st.dataframe(report)
+            st.download_button("Download Invoices (ZIP)", data=archive, file_name="invoices.zip", mime="application/zip")
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import rollup
+
+METHODS = ["Moving Average", "Exponential Smoothing", "Seasonal Naive"]
+WINDOW = 3
+ALPHA = 0.3
+SEASON = 12
+
+
+def monthly_matrix(cube, measure="TotalSales", key="WarehouseID"):
+    # Warehouse x month matrix of monthly totals straight from the aggregate
+    # cube, with any month a warehouse had no orders filled as zero
+    values = rollup(cube, [key, "Month"])[f"{measure}_sum"].unstack("Month", fill_value=0)
+    months = pd.PeriodIndex(values.columns, freq="M")
+    full = pd.period_range(months.min(), months.max(), freq="M")
+    values.columns = months
+    values = values.reindex(columns=full, fill_value=0)
+    return values.index, full, values.to_numpy(dtype="float64")
+
+
+def moving_average(history, horizon, window=WINDOW):
+    level = history[:, -window:].mean(axis=1)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def exponential_smoothing(history, horizon, alpha=ALPHA):
+    # Simple exponential smoothing in closed form: the final level is a
+    # weighted sum of the history, so every series is smoothed in one dot product
+    n = history.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (n - 1)
+    level = history @ weights
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def seasonal_naive(history, horizon, season=SEASON):
+    n = history.shape[1]
+    if n < season:
+        # Not a full season of history yet: fall back to the last observed month
+        return np.repeat(history[:, -1:], horizon, axis=1)
+    return history[:, n - season + np.arange(horizon) % season]
+
+
+FORECASTERS = {
+    "Moving Average": moving_average,
+    "Exponential Smoothing": exponential_smoothing,
+    "Seasonal Naive": seasonal_naive,
+}
+
+
+def forecast_all(history, horizon):
+    return {method: FORECASTERS[method](history, horizon) for method in METHODS}
+
+
+def backtest(history, horizon, origins=3):
+    # Rolling-origin backtest: refit at each of the last `origins` cut-offs and
+    # score the next `horizon` months, pooled across every series
+    n = history.shape[1]
+    rows = []
+    for method in METHODS:
+        abs_errors, actual_totals = [], []
+        for cut in range(n - horizon - origins + 1, n - horizon + 1):
+            if cut < 1:
+                continue
+            predicted = FORECASTERS[method](history[:, :cut], horizon)
+            actual = history[:, cut:cut + horizon]
+            abs_errors.append(np.abs(predicted - actual).ravel())
+            actual_totals.append(np.abs(actual).ravel())
+        if not abs_errors:
+            rows.append({"Method": method, "MAE": np.nan, "WAPE (%)": np.nan})
+            continue
+        abs_errors = np.concatenate(abs_errors)
+        actual_sum = np.concatenate(actual_totals).sum()
+        rows.append({
+            "Method": method,
+            "MAE": abs_errors.mean(),
+            "WAPE (%)": abs_errors.sum() / actual_sum * 100 if actual_sum else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+def forecast_frame(keys, months, forecast, key="WarehouseID"):
+    future = pd.period_range(months[-1] + 1, periods=forecast.shape[1], freq="M")
+    return pd.DataFrame(forecast, index=pd.Index(keys, name=key), columns=future.astype(str))
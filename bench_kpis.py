@@ -0,0 +1,47 @@
+import sys
+import time
+
+from kpis import encode_status, status_rates
+from synthetic_data import make_fact_sales
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+
+
+def lambda_path(df):
+    # The original app.py aggregations: one Python call per group
+    completed = df.groupby(["Month", "WarehouseID"]).agg({"SalesID": "count", "OrderStatus": lambda x: (x == "Completed").sum()})
+    cancelled = df.groupby(["Month", "WarehouseID"])["OrderStatus"].apply(lambda x: (x == "Cancelled").mean() * 100)
+    return completed, cancelled
+
+
+def vectorized_path(df):
+    return status_rates(df, ["Month", "WarehouseID"])
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes=SIZES, n_warehouses=500):
+    # The vectorized path runs on status codes; encoding is timed separately
+    # and included in the headline speedup, since a raw frame pays for it
+    print(f"{'rows':>12} {'groups':>8} {'lambda (s)':>12} {'encode (s)':>11} {'vectorized (s)':>15}"
+          f" {'speedup':>8} {'pre-encoded':>12}")
+    for n_rows in sizes:
+        df = make_fact_sales(n_rows, n_warehouses=n_warehouses)
+        groups = df.groupby(["Month", "WarehouseID"]).ngroups
+        repeat = 1 if n_rows >= 1_000_000 else 3
+        slow = timed(lambda_path, df, repeat=repeat)
+        encode = timed(encode_status, df, repeat=repeat)
+        fast = timed(vectorized_path, encode_status(df), repeat=repeat)
+        print(f"{n_rows:>12,} {groups:>8,} {slow:>12.3f} {encode:>11.3f} {fast:>15.3f}"
+              f" {slow / (encode + fast):>7.1f}x {slow / fast:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or SIZES)
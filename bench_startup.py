@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+
+APPS = ["app.py", "app2.py", "app3.py", "app4.py", "app5.py"]
+BACKENDS = ["statsmodels.tsa.arima.model", "prophet", "pdfplumber", "openpyxl", "fpdf", "matplotlib.pyplot"]
+HEAVY_MODULES = sorted({b.split(".")[0] for b in BACKENDS} | {"cmdstanpy"})
+
+# Runs in a fresh interpreter per app so every measurement is a cold start:
+# streamlit itself is imported first and timed separately, then the app's
+# first render (its own imports plus the initial script run) is timed.
+PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_s = time.perf_counter() - start
+before = set(sys.modules)
+start = time.perf_counter()
+at = AppTest.from_file(os.path.abspath(sys.argv[1]), default_timeout=300).run()
+first_render_s = time.perf_counter() - start
+loaded = sorted({m.split(".")[0] for m in set(sys.modules) - before} & set(json.loads(sys.argv[2])))
+print(json.dumps({"streamlit_s": streamlit_s, "first_render_s": first_render_s,
+                  "heavy_loaded": loaded, "error": str(at.exception[0].message) if at.exception else ""}))
+"""
+
+BACKEND_PROBE = """
+import sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(time.perf_counter() - start)
+"""
+
+
+def measure_app(app):
+    result = subprocess.run([sys.executable, "-c", PROBE, app, json.dumps(HEAVY_MODULES)],
+                            capture_output=True, text=True)
+    lines = result.stdout.strip().splitlines()
+    if result.returncode or not lines:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(lines[-1])
+
+
+def measure_backend(module):
+    result = subprocess.run([sys.executable, "-c", BACKEND_PROBE, module], capture_output=True, text=True)
+    return float(result.stdout) if result.returncode == 0 else None
+
+
+def main(apps=APPS):
+    print("Cold import cost of heavy backends")
+    for module in BACKENDS:
+        seconds = measure_backend(module)
+        print(f"  {module:<28} {'not installed' if seconds is None else f'{seconds:.3f} s'}")
+
+    print()
+    print(f"{'app':<10} {'streamlit (s)':>14} {'first render (s)':>17}  heavy modules loaded")
+    for app in apps:
+        r = measure_app(app)
+        if "first_render_s" not in r:
+            print(f"{app:<10} error: {r['error']}")
+            continue
+        heavy = ", ".join(r["heavy_loaded"]) or "-"
+        note = f"  (error: {r['error']})" if r["error"] else ""
+        print(f"{app:<10} {r['streamlit_s']:>14.3f} {r['first_render_s']:>17.3f}  {heavy}{note}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or APPS)
@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from aggregates import build_cube, mean, monthly_totals, rollup, status_counts
+from baseline_forecast import backtest, forecast_all, monthly_matrix
+from chart_payload import bin_counts, downsample
+from data_loader import CACHE_DIR, load_fact_sales, parquet_path, source_version
+from instrumentation import rss_bytes
+from schemas import decode_months, optimize
+from synthetic_data import make_daily_sales, make_fact_sales, make_invoices, make_shipments
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+INVOICE_COUNTS = [10, 100]
+# Writing and re-parsing a workbook is minutes per 100k rows (and xlsx stops
+# at 1,048,576 rows), so the cold workbook load is only measured up to here
+XLSX_MAX_ROWS = 100_000
+N_WAREHOUSES = 50
+RESULTS_DIR = os.path.join(CACHE_DIR, "bench")
+
+
+# Fixtures: synthetic inputs built once per size and shared by every case
+# at that size. Each takes (n, workdir, get) where get(kind) fetches another.
+
+def _source_stub(n, workdir, get):
+    # A stand-in source file whose Parquet cache is already built, so
+    # load_fact_sales only does the cache lookup and the Parquet read
+    path = os.path.join(workdir, f"factsales-{n}.xlsx")
+    with open(path, "wb") as f:
+        f.write(f"synthetic {n}".encode())
+    cache_dir = os.path.join(workdir, "cache")
+    target = parquet_path(path, "FactSales", source_version(path, cache_dir), cache_dir)
+    pq.write_table(pa.Table.from_pandas(get("sales"), preserve_index=False), target)
+    return path, cache_dir
+
+
+def _workbook(n, workdir, get):
+    path = os.path.join(workdir, f"factsales-{n}-real.xlsx")
+    sales = decode_months(get("sales")).drop(columns="Month")
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        sales.to_excel(writer, sheet_name="FactSales", index=False)
+    return path
+
+
+def _shipments_csv(n, workdir, get):
+    path = os.path.join(workdir, f"shipments-{n}.csv")
+    make_shipments(n).to_csv(path, index=False)
+    return path
+
+
+def _shipment_summary(n, workdir, get):
+    from shipments import summarize_shipments
+    return summarize_shipments(get("shipments_csv"))
+
+
+def _sales_index(n, workdir, get):
+    from sales_index import SalesIndex
+    return SalesIndex(get("sales"))
+
+
+FIXTURES = {
+    # Compact dtypes, as load_fact_sales returns them
+    "sales": lambda n, workdir, get: optimize(make_fact_sales(n, n_warehouses=N_WAREHOUSES)),
+    "cube": lambda n, workdir, get: build_cube(get("sales")),
+    "index": _sales_index,
+    "source_stub": _source_stub,
+    "workbook": _workbook,
+    "shipments_csv": _shipments_csv,
+    "shipment_summary": _shipment_summary,
+    "daily_sales": lambda n, workdir, get: make_daily_sales(n, n_warehouses=5),
+    "invoices": lambda n, workdir, get: make_invoices(n),
+    "model_dir": lambda n, workdir, get: os.path.join(workdir, "models"),
+}
+
+
+# Hot paths. Page cases repeat the aggregations each app.py page runs,
+# without building the Plotly figures.
+
+def load_data_cached(get):
+    path, cache_dir = get("source_stub")
+    return load_fact_sales(path, cache_dir=cache_dir)
+
+
+def load_data_cold(get):
+    cache_dir = tempfile.mkdtemp(dir=os.path.dirname(get("workbook")))
+    try:
+        return load_fact_sales(get("workbook"), cache_dir=cache_dir)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def page_overview(get):
+    cube = get("cube")
+    totals = rollup(cube)
+    monthly_status = status_counts(cube, "Month")
+    return mean(totals, "ProcessingTime"), status_counts(cube), monthly_status.sum(axis=1)
+
+
+def page_sales_analysis(get):
+    sales_trend = get("sales").groupby("Date")["TotalSales"].sum().reset_index()
+    return downsample(sales_trend, "Date", "TotalSales")
+
+
+def page_order_fulfillment(get):
+    return bin_counts(get("sales")["ProcessingTime"], nbins=10)
+
+
+def page_monthly_metrics(get):
+    return monthly_totals(get("cube"))
+
+
+def page_kpi_analysis(get):
+    cube = get("cube")
+    warehouse_totals = rollup(cube, "WarehouseID")
+    warehouse_status = status_counts(cube, "WarehouseID")
+    return (mean(warehouse_totals, "ProcessingTime"),
+            warehouse_status.get("Cancelled", 0) / warehouse_status.sum(axis=1) * 100)
+
+
+def page_moving_average(get):
+    warehouses, months, monthly_sales = monthly_matrix(get("cube"))
+    return pd.Series(monthly_sales.sum(axis=0)).rolling(window=3, min_periods=1).mean()
+
+
+def page_forecasting(get):
+    warehouses, months, history = monthly_matrix(get("cube"))
+    return forecast_all(history, 3), backtest(history, 3)
+
+
+def filter_slice(get):
+    # A cold filtered view: the memoized slices are dropped first
+    index = get("index")
+    index._cache.clear()
+    start, end = index.date_range
+    return index.slice(start + (end - start) / 4, end, index.warehouses[: len(index.warehouses) // 2], ["Completed"])
+
+
+def shipments_summary(get):
+    from shipments import summarize_shipments
+    return summarize_shipments(get("shipments_csv"))
+
+
+def smartway_rollups(get):
+    from smartway import smartway_report
+    return smartway_report(get("shipment_summary"))
+
+
+def invoice_excel(get):
+    from invoices import generate_invoice_excel
+    return [generate_invoice_excel(invoice) for invoice in get("invoices")]
+
+
+def invoice_pdf(get):
+    from invoices import generate_invoice_pdf
+    return [generate_invoice_pdf(invoice) for invoice in get("invoices")]
+
+
+def forecast_sales_cold(get):
+    # app2.forecast_sales with an empty model cache: one ARIMA fit per warehouse
+    from forecasting import forecast_many, monthly_series
+    model_dir = tempfile.mkdtemp(dir=os.path.dirname(get("model_dir")))
+    try:
+        return forecast_many(monthly_series(get("daily_sales"), "Sales", "WarehouseID"), 6, "ARIMA",
+                             max_workers=1, model_dir=model_dir)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+def forecast_sales_cached(get):
+    from forecasting import forecast_many, monthly_series
+    return forecast_many(monthly_series(get("daily_sales"), "Sales", "WarehouseID"), 6, "ARIMA",
+                         max_workers=1, model_dir=get("model_dir"))
+
+
+# name -> (scale, function); scale "rows" runs at --sizes, "invoices" at --invoices
+CASES = {
+    "load_data (parquet cache)": ("rows", load_data_cached),
+    "load_data (xlsx, cold)": ("rows", load_data_cold),
+    "build_cube": ("rows", lambda get: build_cube(get("sales"))),
+    "page: Overview": ("rows", page_overview),
+    "page: Sales Analysis": ("rows", page_sales_analysis),
+    "page: Order Fulfillment": ("rows", page_order_fulfillment),
+    "page: Monthly Metrics": ("rows", page_monthly_metrics),
+    "page: KPI Analysis": ("rows", page_kpi_analysis),
+    "page: Moving Average": ("rows", page_moving_average),
+    "page: Forecasting": ("rows", page_forecasting),
+    "filters: SalesIndex build": ("rows", lambda get: _sales_index(None, None, get)),
+    "filters: slice": ("rows", filter_slice),
+    "summarize_shipments": ("rows", shipments_summary),
+    "smartway_report": ("rows", smartway_rollups),
+    "forecast_sales (cold)": ("rows", forecast_sales_cold),
+    "forecast_sales (cached fits)": ("rows", forecast_sales_cached),
+    "generate_invoice_excel": ("invoices", invoice_excel),
+    "generate_invoice_pdf": ("invoices", invoice_pdf),
+}
+
+
+def timed(func, get, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(get)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func, get, interval=0.005):
+    # A separate run under tracemalloc (NumPy and pandas buffers are traced;
+    # Arrow's own pool is not) while a thread samples process RSS. The RSS
+    # delta is None where RSS can't be measured
+    baseline = rss_bytes()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    tracemalloc.start()
+    if baseline is not None:
+        sampler.start()
+    try:
+        func(get)
+    finally:
+        done.set()
+        if baseline is not None:
+            sampler.join()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    if baseline is None:
+        return traced_peak / 2**20, None
+    peak[0] = max(peak[0], rss_bytes())
+    return traced_peak / 2**20, (peak[0] - baseline) / 2**20
+
+
+def run_size(n, names, repeat, workdir):
+    fixtures = {}
+
+    def get(kind):
+        if kind not in fixtures:
+            fixtures[kind] = FIXTURES[kind](n, workdir, get)
+        return fixtures[kind]
+
+    results = []
+    for name in names:
+        if name == "load_data (xlsx, cold)" and n > XLSX_MAX_ROWS:
+            results.append({"case": name, "n": n, "skipped": f"workbooks are only generated up to {XLSX_MAX_ROWS:,} rows"})
+            print(f"{name:<30} {n:>12,} {'skipped':>10}", flush=True)
+            continue
+        func = CASES[name][1]
+        try:
+            func(get)  # warm-up: builds fixtures and fills lazy imports and caches
+            wall = timed(func, get, 1 if n >= 1_000_000 else repeat)
+            traced_mb, rss_mb = peak_memory(func, get)
+        except Exception as exc:
+            results.append({"case": name, "n": n, "error": f"{type(exc).__name__}: {exc}"})
+            print(f"{name:<30} {n:>12,} {'failed':>10}  {type(exc).__name__}: {exc}", flush=True)
+            continue
+        results.append({"case": name, "n": n, "wall_s": wall, "peak_alloc_mb": traced_mb, "peak_rss_delta_mb": rss_mb})
+        rss_text = "n/a" if rss_mb is None else f"{rss_mb:.1f}"
+        print(f"{name:<30} {n:>12,} {wall:>10.4f} {traced_mb:>12.1f} {rss_text:>12}", flush=True)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(old, new):
+    # Wall time of matching (case, n) pairs between two saved runs
+    before = {(r["case"], r["n"]): r for r in old["results"] if "wall_s" in r}
+    print(f"\nvs {old['environment'].get('commit') or 'baseline'} ({old['environment'].get('timestamp', '')})")
+    print(f"{'case':<30} {'n':>12} {'before (s)':>11} {'after (s)':>10} {'speedup':>8}")
+    for r in new["results"]:
+        prev = before.get((r["case"], r["n"]))
+        if prev is None or "wall_s" not in r:
+            continue
+        print(f"{r['case']:<30} {r['n']:>12,} {prev['wall_s']:>11.4f} {r['wall_s']:>10.4f} {prev['wall_s'] / r['wall_s']:>7.2f}x")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Time the dashboard hot paths on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="row counts for data cases")
+    parser.add_argument("--invoices", type=int, nargs="+", default=INVOICE_COUNTS, help="invoice counts for invoice cases")
+    parser.add_argument("--cases", nargs="+", help="only run cases whose name contains one of these strings")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case below 1M rows (best is kept)")
+    parser.add_argument("--output", help=f"results file (default: {RESULTS_DIR}/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name for name in CASES if not args.cases or any(c.lower() in name.lower() for c in args.cases)]
+    env = environment()
+    print(f"{'case':<30} {'n':>12} {'wall (s)':>10} {'alloc (MB)':>12} {'rss +(MB)':>12}")
+
+    results = []
+    for scale, sizes in [("rows", args.sizes), ("invoices", args.invoices)]:
+        scale_names = [name for name in names if CASES[name][0] == scale]
+        for n in sizes if scale_names else []:
+            workdir = tempfile.mkdtemp(prefix="bench-")
+            try:
+                results += run_size(n, scale_names, args.repeat, workdir)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    run = {"environment": env, "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, f"{env['commit'] or 'nogit'}-{env['timestamp'][:19].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"\nSaved {len(results)} results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), run)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
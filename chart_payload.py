@@ -0,0 +1,86 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+# Set DASHBOARD_LOG_PAYLOAD=1 to log before/after chart payload sizes at
+# WARNING, which Streamlit's default logging prints to the server console.
+# Without it they are logged at INFO, for deployments that configure the
+# chart_payload logger themselves
+PAYLOAD_ENV_FLAG = "DASHBOARD_LOG_PAYLOAD"
+
+# Plotly charts in the default Streamlit column are about this wide; more
+# points than pixels only adds payload without changing what is drawn
+CHART_WIDTH_PX = 700
+PAGE_SIZE = 100
+
+
+def _numeric(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype("int64").astype("float64")
+    return values.astype("float64")
+
+
+def lttb_indices(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keep the first and last points and, from
+    # each bucket in between, the point forming the largest triangle with the
+    # previously kept point and the average of the next bucket
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = _numeric(x)
+    y = _numeric(y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(area.argmax()) if len(area) else start
+        kept[i + 1] = a
+    return kept
+
+
+def downsample(df, x, y, threshold=CHART_WIDTH_PX):
+    # Shape-preserving downsample of one or more line series sharing an x axis
+    if len(df) <= threshold:
+        return df
+    columns = [y] if isinstance(y, str) else list(y)
+    kept = np.unique(np.concatenate([lttb_indices(df[x].to_numpy(), df[c].to_numpy(), threshold) for c in columns]))
+    return df.iloc[kept]
+
+
+def bin_counts(values, nbins, column="ProcessingTime"):
+    # Pre-binned histogram: ships nbins bars instead of every raw value
+    values = pd.Series(values).dropna()
+    counts, edges = np.histogram(values.to_numpy(), bins=nbins)
+    labels = [f"{lo:g}–{hi:g}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return pd.DataFrame({column: labels, "count": counts})
+
+
+def page(df, page_number, page_size=PAGE_SIZE):
+    start = (page_number - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def page_count(df, page_size=PAGE_SIZE):
+    return max(1, -(-len(df) // page_size))
+
+
+def log_payload(name, fig, full_fig=None, rows_before=None, rows_after=None):
+    # Payload sizes are only measured when logging is on; building the
+    # full-resolution figure for comparison is deferred via a callable
+    level = logging.WARNING if os.environ.get(PAYLOAD_ENV_FLAG, "") not in ("", "0") else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    after = len(fig.to_json())
+    before = len(full_fig().to_json()) if full_fig is not None else after
+    logger.log(level, "chart=%s rows=%s->%s payload_bytes=%d->%d", name, rows_before, rows_after, before, after)
@@ -0,0 +1,121 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from schemas import SCHEMA_VERSION, optimize
+
+CACHE_DIR = ".cache"
+MANIFEST_NAME = "manifest.json"
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def atomic_write(path, write):
+    # Write to a unique temp file beside the target and rename it into place,
+    # so readers never see a half-written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def _write_manifest(cache_dir, manifest):
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    atomic_write(os.path.join(cache_dir, MANIFEST_NAME), write)
+
+
+def source_version(file_path, cache_dir=CACHE_DIR):
+    # The mtime/size pair lets us skip re-hashing an unchanged workbook;
+    # the content hash is only recomputed when the file has been touched.
+    stat = os.stat(file_path)
+    key = os.path.abspath(file_path)
+    manifest = _read_manifest(cache_dir)
+    entry = manifest.get(key)
+    if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return entry["hash"]
+
+    digest = file_hash(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest[key] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": digest}
+    _write_manifest(cache_dir, manifest)
+    return digest
+
+
+def prepare_fact_sales(df):
+    # Ensure Date column is in datetime format
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+
+    # Drop rows with missing dates to avoid KeyError
+    df = df.dropna(subset=["Date"]).reset_index(drop=True)
+
+    # Extract Month from Date
+    df["Month"] = df["Date"].dt.to_period("M").astype(str)
+    return df
+
+
+def parquet_path(file_path, sheet_name, version, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{stem}.{sheet_name}.{version[:16]}.s{SCHEMA_VERSION}.parquet")
+
+
+def build_parquet(file_path, sheet_name, target):
+    # The cache holds the compact dtypes, so loading it needs no conversion
+    df = optimize(prepare_fact_sales(pd.read_excel(file_path, sheet_name=sheet_name)))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    atomic_write(target, lambda tmp_path: pq.write_table(table, tmp_path))
+
+
+def _remove_old_parquet(file_path, sheet_name, target, cache_dir):
+    # Caches of earlier workbook or schema versions are never read again. A
+    # file another process still has open can't be removed on Windows; it is
+    # left for the next rebuild
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    for old in glob.glob(os.path.join(cache_dir, f"{glob.escape(stem)}.{glob.escape(sheet_name)}.*.parquet")):
+        if old != target:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def load_fact_sales(file_path, sheet_name="FactSales", cache_dir=CACHE_DIR):
+    version = source_version(file_path, cache_dir)
+    target = parquet_path(file_path, sheet_name, version, cache_dir)
+    if not os.path.exists(target):
+        os.makedirs(cache_dir, exist_ok=True)
+        build_parquet(file_path, sheet_name, target)
+        _remove_old_parquet(file_path, sheet_name, target, cache_dir)
+
+    table = pq.read_table(target, memory_map=True)
+    return optimize(table.to_pandas())
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_loader import CACHE_DIR, atomic_write
+from instrumentation import stage
+from schemas import SCHEMA_VERSION, decode_months
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+CHUNK_ROWS = 50_000
+# Disk budget for cached artifacts; the least recently used go first
+EXPORT_MAX_BYTES = int(os.environ.get("EXPORT_CACHE_MB", "1024")) * 2**20
+
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def export_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def data_tag(data_version):
+    return export_key(data_version, SCHEMA_VERSION)[:8]
+
+
+def view_version(data_version, start, end, warehouses, statuses):
+    # Cache key for one filtered dashboard view; the headless runner uses the
+    # same key so precomputed exports are picked up by the app. The leading
+    # data tag lets prune_exports find artifacts of older data versions. The
+    # selections are sorted so pick order doesn't change the key
+    key = export_key(data_version, SCHEMA_VERSION, start, end, tuple(sorted(warehouses)), tuple(sorted(statuses)))
+    return f"{data_tag(data_version)}.{key}"
+
+
+def iter_csv_chunks(df, chunk_rows=CHUNK_ROWS):
+    # CSV bytes a slice at a time; only one chunk's text is ever in memory
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def write_export(df, path, fmt, chunk_rows=CHUNK_ROWS):
+    df = decode_months(df)
+    if fmt == "Parquet":
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression="zstd")
+        return
+    opener = gzip.open if fmt == "CSV (gzip)" else open
+    with opener(path, "wb") as f:
+        for chunk in iter_csv_chunks(df, chunk_rows):
+            f.write(chunk)
+
+
+def export_file(df, name, version, fmt, export_dir=EXPORT_DIR):
+    # Artifacts are cached on disk per data version and format, so repeat
+    # downloads (from any session) reuse the file instead of re-serializing
+    ext, _ = EXPORT_FORMATS[fmt]
+    path = os.path.join(export_dir, f"{name}-{version}{ext}")
+    if not os.path.exists(path):
+        atomic_write(path, lambda tmp_path: write_export(df, tmp_path, fmt))
+        prune_exports(version.split(".", 1)[0], export_dir, keep=path)
+    return path
+
+
+def cached_export_path(name, version, fmt, export_dir=EXPORT_DIR):
+    ext, _ = EXPORT_FORMATS[fmt]
+    path = os.path.join(export_dir, f"{name}-{version}{ext}")
+    if not os.path.exists(path):
+        return None
+    # Mark the artifact as recently used for the size cap
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def prune_exports(current_tag=None, export_dir=EXPORT_DIR, max_bytes=EXPORT_MAX_BYTES, keep=None):
+    # Drop artifacts built from other data versions, then the least recently
+    # used ones until the directory fits max_bytes. Files that vanish or are
+    # still open elsewhere (Windows) are skipped
+    files = []
+    for entry in os.scandir(export_dir) if os.path.isdir(export_dir) else []:
+        if not entry.is_file() or entry.name.endswith(".tmp"):
+            continue
+        stale = current_tag is not None and f"-{current_tag}." not in entry.name
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stale, stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, _, size, _ in files)
+    # Stale versions first, then oldest first
+    for stale, _, size, path in sorted(files, key=lambda f: (not f[0], f[1])):
+        if path == keep or (not stale and total <= max_bytes):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def download_on_demand(label, key, build, file_name, mime):
+    # Streamlit helper: build the file only when asked, keep the latest
+    # artifact per label in session state, then offer it for download
+    import streamlit as st
+
+    artifacts = st.session_state.setdefault("_exports", {})
+    cached = artifacts.get(label)
+    if cached is None or cached[0] != key:
+        if not st.button(f"Prepare {label}", key=f"prepare-{label}"):
+            return
+        with stage("export", label):
+            artifacts[label] = cached = (key, build())
+    st.download_button(label=label, data=cached[1], file_name=file_name, mime=mime, key=f"download-{label}")
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data_loader import CACHE_DIR, atomic_write
+
+MODEL_DIR = os.path.join(CACHE_DIR, "models")
+# Fitted models are kept least-recently-used up to this size
+MODEL_MAX_BYTES = int(os.environ.get("MODEL_CACHE_MB", "512")) * 2**20
+ARIMA_ORDER = (5, 1, 0)
+
+
+def series_key(series, model_type):
+    # Fitted models only depend on the history and the model, not on the
+    # horizon, so switching 6 -> 12 periods reuses the same fit
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+    digest.update(f"{model_type}:{ARIMA_ORDER}".encode())
+    return digest.hexdigest()
+
+
+def _model_path(key, model_type, model_dir):
+    ext = "json" if model_type == "Prophet" else "pkl"
+    return os.path.join(model_dir, f"{model_type.lower()}-{key[:24]}.{ext}")
+
+
+# statsmodels and Prophet (with its cmdstan backend) are imported only when a
+# model of that type is actually fitted or loaded, keeping app startup light
+def _fit(series, model_type):
+    if model_type == "ARIMA":
+        from statsmodels.tsa.arima.model import ARIMA
+
+        return ARIMA(series, order=ARIMA_ORDER).fit()
+    from prophet import Prophet
+
+    df = series.rename_axis("ds").rename("y").reset_index()
+    model = Prophet()
+    model.fit(df)
+    return model
+
+
+def _save_model(model, model_type, path):
+    def write(tmp_path):
+        if model_type == "Prophet":
+            from prophet.serialize import model_to_json
+
+            with open(tmp_path, "w") as f:
+                f.write(model_to_json(model))
+        else:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(model, f)
+
+    atomic_write(path, write)
+
+
+def _load_model(model_type, path):
+    if model_type == "Prophet":
+        from prophet.serialize import model_from_json
+
+        with open(path) as f:
+            return model_from_json(f.read())
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def prune_models(model_dir=MODEL_DIR, max_bytes=MODEL_MAX_BYTES, keep=None):
+    # Drop the least recently used fits until the directory fits max_bytes.
+    # Files that vanish (another worker pruned them) or are still open
+    # elsewhere (Windows) are skipped
+    files = []
+    for entry in os.scandir(model_dir) if os.path.isdir(model_dir) else []:
+        if not entry.is_file() or entry.name.endswith(".tmp"):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def fitted_model(series, model_type, model_dir=MODEL_DIR):
+    path = _model_path(series_key(series, model_type), model_type, model_dir)
+    if os.path.exists(path):
+        try:
+            model = _load_model(model_type, path)
+            # Mark it recently used for prune_models
+            os.utime(path)
+            return model
+        except Exception:
+            pass
+    model = _fit(series, model_type)
+    os.makedirs(model_dir, exist_ok=True)
+    _save_model(model, model_type, path)
+    prune_models(model_dir, keep=path)
+    return model
+
+
+def forecast_series(series, periods, model_type="ARIMA", model_dir=MODEL_DIR):
+    model = fitted_model(series, model_type, model_dir)
+    if model_type == "ARIMA":
+        forecast = model.forecast(steps=periods)
+    else:
+        future = model.make_future_dataframe(periods=periods, freq="ME")
+        forecast = model.predict(future)[["ds", "yhat"]].tail(periods).set_index("ds")["yhat"]
+    return forecast.rename(series.name)
+
+
+def _forecast_task(args):
+    return forecast_series(*args)
+
+
+def monthly_series(data, value_col, group_col=None):
+    if group_col is None:
+        series = data[value_col].resample("ME").sum()
+        return {value_col: series.rename(value_col)}
+    grouped = data.groupby(group_col)[value_col].resample("ME").sum()
+    return {key: grouped.xs(key, level=group_col).rename(key) for key in grouped.index.unique(level=group_col)}
+
+
+def forecast_many(series_by_key, periods, model_type="ARIMA", max_workers=None, model_dir=MODEL_DIR):
+    # One fit per series, spread across a process pool; cached fits load from disk
+    if not series_by_key:
+        return pd.DataFrame()
+    tasks = [(series, periods, model_type, model_dir) for series in series_by_key.values()]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers < 2:
+        forecasts = list(map(_forecast_task, tasks))
+    else:
+        # Spawned, not forked: this may run on a run_reports worker thread
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            forecasts = list(pool.map(_forecast_task, tasks))
+    return pd.concat(forecasts, axis=1, keys=list(series_by_key))
+
+
+def forecast_excel(forecast):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        forecast.to_excel(writer, sheet_name="Forecast")
+    return output.getvalue()
@@ -0,0 +1,271 @@
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from aggregates import build_cube, merge_cubes
+from data_loader import CACHE_DIR, atomic_write, prepare_fact_sales, source_version
+from schemas import optimize
+
+STORE_DIR = os.path.join(CACHE_DIR, "factsales_store")
+PARTITION_KEY = "Month"
+# A lock file older than this is left over from a crashed writer
+LOCK_STALE_SECONDS = 600
+
+
+def _paths(store_dir):
+    return {
+        "rows": os.path.join(store_dir, "rows"),
+        "ids": os.path.join(store_dir, "sales_ids.npy"),
+        "cube": os.path.join(store_dir, "cube.parquet"),
+        "manifest": os.path.join(store_dir, "manifest.json"),
+    }
+
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(_paths(store_dir)["manifest"])
+
+
+def read_manifest(store_dir=STORE_DIR):
+    with open(_paths(store_dir)["manifest"]) as f:
+        return json.load(f)
+
+
+def store_version(store_dir=STORE_DIR):
+    return f"store-{read_manifest(store_dir)['version']}"
+
+
+@contextmanager
+def store_lock(store_dir=STORE_DIR, timeout=60, poll=0.05):
+    # One writer at a time across threads and processes: the manifest, ID
+    # index and cube are read, extended and rewritten as a unit. The lock file
+    # sits beside the store so a rebuild can swap the whole directory
+    path = os.path.normpath(store_dir) + ".lock"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Another append is still running ({path})")
+            time.sleep(poll)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        os.remove(path)
+
+
+def _save_ids(ids):
+    def write(path):
+        with open(path, "wb") as f:
+            np.save(f, ids)
+    return write
+
+
+def _save_json(data):
+    def write(path):
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+    return write
+
+
+def read_drop(file, sheet_name="FactSales"):
+    name = getattr(file, "name", file)
+    if str(name).endswith(".xlsx"):
+        xls = pd.ExcelFile(file)
+        df = pd.read_excel(xls, sheet_name=sheet_name if sheet_name in xls.sheet_names else 0)
+    else:
+        df = pd.read_csv(file)
+    if "Date" not in df.columns:
+        raise ValueError("Drop is missing columns: Date")
+    return prepare_fact_sales(df)
+
+
+def _conform(delta, dtypes):
+    # Cast every drop to the store's schema so CSV and XLSX partitions agree
+    missing = [c for c in dtypes if c not in delta.columns]
+    if missing:
+        raise ValueError(f"Drop is missing columns: {', '.join(missing)}")
+    delta = delta[list(dtypes)].copy()
+    for col, dtype in dtypes.items():
+        if dtype.startswith("datetime64"):
+            delta[col] = pd.to_datetime(delta[col], errors="coerce")
+            continue
+        try:
+            delta[col] = delta[col].astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Drop column {col} can't be stored as {dtype}: {e}") from e
+    return delta
+
+
+def _split_new_rows(delta, known_ids):
+    # Drop SalesIDs already in the store (binary search on the sorted index)
+    # and repeats within the drop itself
+    ids = delta["SalesID"].to_numpy(dtype="int64")
+    pos = np.searchsorted(known_ids, ids)
+    pos[pos == len(known_ids)] = 0
+    seen = (known_ids[pos] == ids) if len(known_ids) else np.zeros(len(ids), dtype=bool)
+    fresh = ~seen & ~delta["SalesID"].duplicated().to_numpy()
+    return delta[fresh], int((~fresh).sum())
+
+
+def _write_partitions(rows_dir, delta, version):
+    months = []
+    for month, part in delta.groupby(PARTITION_KEY, sort=True):
+        part_dir = os.path.join(rows_dir, f"{PARTITION_KEY}={month}")
+        os.makedirs(part_dir, exist_ok=True)
+        table = pa.Table.from_pandas(part.drop(columns=PARTITION_KEY), preserve_index=False)
+        target = os.path.join(part_dir, f"part-{version:06d}-{uuid.uuid4().hex[:8]}.parquet")
+        atomic_write(target, lambda p: pq.write_table(table, p))
+        months.append(month)
+    return months
+
+
+def ingest(file, store_dir=STORE_DIR):
+    delta = read_drop(file)
+    with store_lock(store_dir):
+        return _append(delta, store_dir)
+
+
+def _seed_info(file_path):
+    return {"path": os.path.abspath(file_path), "source_version": source_version(file_path)}
+
+
+def seed_store(file_path, store_dir=STORE_DIR):
+    # Start the store as a copy of the dashboard workbook, remembering which
+    # version of it was copied so sync_seed can notice a replaced workbook
+    delta = read_drop(file_path)
+    with store_lock(store_dir):
+        if not store_exists(store_dir):
+            return _append(delta, store_dir, seed=_seed_info(file_path))
+    return None
+
+
+def _rows_since(store_dir, version):
+    # Rows from partitions written after the given store version, i.e. the
+    # appended drops on top of the seed
+    parts = []
+    for path in glob.glob(os.path.join(_paths(store_dir)["rows"], "*", "part-*.parquet")):
+        if int(os.path.basename(path).split("-")[1]) > version:
+            parts.append(pq.read_table(path).to_pandas())
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def _seed_current(manifest, file_path=None):
+    seed = manifest.get("seed", {})
+    file_path = file_path or seed.get("path")
+    return file_path is None or seed.get("source_version") == source_version(file_path)
+
+
+def sync_seed(file_path=None, store_dir=STORE_DIR):
+    # When the seed workbook has been replaced since the store was built,
+    # rebuild the store from the new workbook and replay the appended drops on
+    # top of it, so refreshing the workbook still refreshes the dashboard.
+    # Returns True if the store was rebuilt.
+    # Checked without the lock first: this runs on every dashboard rerun
+    if not store_exists(store_dir) or _seed_current(read_manifest(store_dir), file_path):
+        return False
+    with store_lock(store_dir):
+        manifest = read_manifest(store_dir)
+        if _seed_current(manifest, file_path):
+            return False
+        seed = manifest.get("seed", {})
+        file_path = file_path or seed["path"]
+
+        # Stores from before the seed was recorded were seeded as version 1
+        appended = _rows_since(store_dir, seed.get("store_version", 1))
+        new_dir = f"{os.path.normpath(store_dir)}.{uuid.uuid4().hex[:8]}.new"
+        old_dir = f"{os.path.normpath(store_dir)}.{uuid.uuid4().hex[:8]}.old"
+        try:
+            # Versions keep counting up, so no cache keyed on store_version
+            # can mistake the rebuilt store for an older one
+            _append(read_drop(file_path), new_dir, seed=_seed_info(file_path), base_version=manifest["version"])
+            if appended is not None:
+                _append(prepare_fact_sales(appended), new_dir)
+            os.replace(store_dir, old_dir)
+            os.replace(new_dir, store_dir)
+        finally:
+            shutil.rmtree(new_dir, ignore_errors=True)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return True
+
+
+def _append(delta, store_dir, seed=None, base_version=0):
+    paths = _paths(store_dir)
+    if store_exists(store_dir):
+        manifest = read_manifest(store_dir)
+        known_ids = np.load(paths["ids"])
+        cube = pd.read_parquet(paths["cube"])
+    else:
+        os.makedirs(paths["rows"], exist_ok=True)
+        manifest = {"version": base_version, "rows": 0, "dtypes": {c: str(t) for c, t in delta.dtypes.items()}}
+        known_ids = np.empty(0, dtype="int64")
+        cube = None
+
+    delta = _conform(delta, manifest["dtypes"])
+    delta, duplicates = _split_new_rows(delta, known_ids)
+    summary = {"appended": len(delta), "duplicates": duplicates, "months": []}
+    if delta.empty:
+        return summary
+
+    version = manifest["version"] + 1
+    summary["months"] = _write_partitions(paths["rows"], delta, version)
+
+    # Running aggregates and the SalesID index absorb only the delta
+    cube = merge_cubes(cube, build_cube(delta))
+    new_ids = np.sort(delta["SalesID"].to_numpy(dtype="int64"))
+    positions = np.searchsorted(known_ids, new_ids)
+    known_ids = np.insert(known_ids, positions, new_ids)
+
+    atomic_write(paths["cube"], lambda p: cube.to_parquet(p))
+    atomic_write(paths["ids"], _save_ids(known_ids))
+    manifest.update(version=version, rows=manifest["rows"] + len(delta))
+    if seed is not None:
+        manifest["seed"] = {**seed, "store_version": version}
+    atomic_write(paths["manifest"], _save_json(manifest))
+    return summary
+
+
+def load_store(store_dir=STORE_DIR):
+    manifest = read_manifest(store_dir)
+    partitioning = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive")
+    dataset = ds.dataset(_paths(store_dir)["rows"], format="parquet", partitioning=partitioning)
+    df = dataset.to_table().to_pandas()
+    df[PARTITION_KEY] = df[PARTITION_KEY].astype(str)
+    df = df.sort_values("SalesID", kind="stable", ignore_index=True)
+    return optimize(df[list(manifest["dtypes"])])
+
+
+def load_store_cube(store_dir=STORE_DIR):
+    return pd.read_parquet(_paths(store_dir)["cube"])
+
+
+def main(files):
+    for file in files:
+        summary = ingest(file)
+        months = ", ".join(summary["months"]) or "none"
+        print(f"{file}: appended {summary['appended']} rows, rejected {summary['duplicates']} duplicates (months: {months})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
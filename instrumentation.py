@@ -0,0 +1,218 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from data_loader import CACHE_DIR
+
+STAGES = ["load", "transform", "aggregate", "render", "export"]
+LOG_PATH = os.environ.get("DASHBOARD_PROFILE_LOG", os.path.join(CACHE_DIR, "logs", "stages.jsonl"))
+# Profiling is on for every session when this is set, or per session with ?debug=1
+ENV_FLAG = "DASHBOARD_PROFILE"
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def rss_bytes():
+    # Resident set size from /proc on Linux, else from psutil when installed.
+    # None where neither is available, so memory columns read as unavailable
+    # rather than as a zero delta
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class _NoStage:
+    # Shared do-nothing stage handed out while profiling is off, so an
+    # instrumented block costs one attribute lookup and a bool check
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class Stage:
+    def __init__(self, run, kind, name, rows):
+        self.run = run
+        self.kind = kind
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._rss = rss_bytes()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.run.record(self.kind, self.name, self._start, self._rss, self.rows,
+                        exc_type.__name__ if exc_type else "")
+        return False
+
+
+class Run:
+    def __init__(self, app, session="", rerun=0):
+        self.app = app
+        self.page = ""
+        self.session = session
+        self.rerun = rerun
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.stages = []
+        self._mark = (self.started, rss_bytes())
+
+    def record(self, kind, name, start, rss, rows=None, error=""):
+        end, end_rss = time.perf_counter(), rss_bytes()
+        self.stages.append({
+            "kind": kind,
+            "name": name,
+            "wall_ms": round((end - start) * 1000, 3),
+            "rows": None if rows is None else int(rows),
+            "mem_delta_mb": None if rss is None or end_rss is None else round((end_rss - rss) / 2**20, 3),
+            "error": error,
+        })
+        self._mark = (end, end_rss)
+
+    def checkpoint(self, kind, name, rows=None):
+        self.record(kind, name, *self._mark, rows)
+
+    def records(self):
+        base = {"ts": self.timestamp, "run_id": self.run_id, "app": self.app, "page": self.page,
+                "session": self.session, "rerun": self.rerun}
+        return [{**base, **s} for s in self.stages]
+
+    def frame(self):
+        return pd.DataFrame(self.stages, columns=["kind", "name", "wall_ms", "rows", "mem_delta_mb", "error"])
+
+
+def stage(kind, name, rows=None):
+    # with stage("aggregate", "monthly metrics") as s: ...; s.rows = len(df)
+    run = getattr(_local, "run", None)
+    if run is None:
+        return _NO_STAGE
+    return Stage(run, kind, name, rows)
+
+
+def checkpoint(kind, name, rows=None):
+    # Straight-line scripts: record everything since the previous stage or
+    # checkpoint as one stage, without re-indenting the block into a with
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.checkpoint(kind, name, rows)
+
+
+def _session_info():
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    reruns = st.session_state.get("_stage_reruns", 0) + 1
+    st.session_state["_stage_reruns"] = reruns
+    return (ctx.session_id if ctx is not None else ""), reruns
+
+
+def profiling_requested():
+    import streamlit as st
+
+    if os.environ.get(ENV_FLAG, "") not in ("", "0"):
+        return True
+    try:
+        return st.query_params.get("debug") == "1"
+    except Exception:
+        return False
+
+
+def start_run(app, enabled=None):
+    # Called at the top of a Streamlit script; stages recorded during this
+    # rerun are collected on the script thread and written by finish_run
+    if enabled is None:
+        enabled = profiling_requested()
+    if not enabled:
+        _local.run = None
+        return None
+    session, rerun = _session_info()
+    _local.run = Run(app, session, rerun)
+    return _local.run
+
+
+def set_page(page):
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.page = page
+
+
+def write_log(records, path=LOG_PATH):
+    if not records:
+        return
+    lines = "".join(json.dumps(r, default=str) + "\n" for r in records)
+    with _log_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            f.write(lines)
+
+
+def finish_run(show_panel=True, path=LOG_PATH):
+    # Append this rerun's stages to the JSONL log and show them in a sidebar expander
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    # Whatever ran after the last checkpoint (trailing widgets, downloads)
+    run.checkpoint("render", "rest of page")
+    write_log(run.records(), path)
+    if show_panel:
+        debug_panel(run)
+    return run
+
+
+def debug_panel(run):
+    import streamlit as st
+
+    stages = run.frame()
+    total_ms = (time.perf_counter() - run.started) * 1000
+    with st.sidebar.expander("⏱ Stage timings", expanded=False):
+        st.caption(f"Rerun {run.rerun} · {total_ms:.0f} ms total · run {run.run_id}")
+        st.dataframe(stages, hide_index=True)
+        by_kind = stages.groupby("kind", sort=False)["wall_ms"].sum().reindex(STAGES).dropna()
+        st.caption(" · ".join(f"{kind} {ms:.0f} ms" for kind, ms in by_kind.items()))
+
+
+def read_log(path=LOG_PATH):
+    return pd.read_json(path, lines=True)
+
+
+def summarize_log(path=LOG_PATH):
+    # Offline view: per app/page/stage, how often it ran and its median and p95 wall time
+    log = read_log(path)
+    grouped = log.groupby(["app", "page", "kind", "name"], sort=True)
+    summary = grouped["wall_ms"].describe(percentiles=[0.5, 0.95])[["count", "50%", "95%", "max"]]
+    summary["rows_max"] = grouped["rows"].max()
+    summary["mem_delta_mb_max"] = grouped["mem_delta_mb"].max()
+    return summary.rename(columns={"50%": "p50_ms", "95%": "p95_ms", "max": "max_ms"})
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    print(summarize_log(sys.argv[1] if len(sys.argv) > 1 else LOG_PATH).to_string())
@@ -0,0 +1,132 @@
+import datetime
+import io
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from invoices import generate_invoice_excel, generate_invoice_pdf
+
+HEADER_FIELDS = [
+    "Sales Order No", "Date", "Bill To", "Ship To", "Importer of Record",
+    "Special Instructions", "Incoterms", "Mode", "Freight Forwarder", "Total Weight",
+]
+ITEM_FIELDS = ["Description", "Quantity", "Unit Price", "Total Price"]
+ORDER_KEY = "Sales Order No"
+
+
+def _read_table(file, sheet_name=None):
+    name = str(getattr(file, "name", file))
+    if hasattr(file, "seek"):
+        file.seek(0)
+    if name.endswith(".xlsx"):
+        return pd.read_excel(file, sheet_name=sheet_name or 0, dtype={ORDER_KEY: str})
+    return pd.read_csv(file, dtype={ORDER_KEY: str})
+
+
+def _clean(value):
+    return "" if pd.isna(value) else value
+
+
+def _format_date(value):
+    # Excel dates arrive as Timestamps; print them like Manual Entry's str(date)
+    if isinstance(value, datetime.datetime):
+        return str(value.date())
+    return str(value)
+
+
+def load_batch(orders_file, items_file=None):
+    # Orders can come as one flat table (a row per line item with the header
+    # fields repeated), as an XLSX with "Orders" and "Items" sheets, or as an
+    # orders file plus a separate items file joined on Sales Order No
+    name = str(getattr(orders_file, "name", orders_file))
+    if items_file is not None:
+        orders = _read_table(orders_file)
+        items = _read_table(items_file)
+    elif name.endswith(".xlsx") and {"Orders", "Items"} <= set(pd.ExcelFile(orders_file).sheet_names):
+        orders = _read_table(orders_file, "Orders")
+        items = _read_table(orders_file, "Items")
+    else:
+        orders = items = _read_table(orders_file)
+
+    if ORDER_KEY not in orders.columns:
+        raise ValueError(f"Orders file needs a '{ORDER_KEY}' column")
+
+    items = items[[c for c in [ORDER_KEY] + ITEM_FIELDS if c in items.columns]]
+    if "Description" in items.columns:
+        items = items.dropna(subset=["Description"])
+    if "Total Price" not in items.columns and {"Quantity", "Unit Price"} <= set(items.columns):
+        items = items.assign(**{"Total Price": items["Quantity"] * items["Unit Price"]})
+    items_by_order = {key: group for key, group in items.groupby(ORDER_KEY, sort=False)}
+
+    invoices = []
+    for _, order in orders.drop_duplicates(ORDER_KEY).iterrows():
+        invoice_data = {field: _clean(order.get(field, "")) for field in HEADER_FIELDS}
+        invoice_data["Date"] = _format_date(invoice_data["Date"])
+        lines = items_by_order.get(order[ORDER_KEY])
+        invoice_data["Items"] = [] if lines is None else [
+            {field: _clean(line.get(field, "")) for field in ITEM_FIELDS} for line in lines.to_dict("records")
+        ]
+        invoices.append(invoice_data)
+    return invoices
+
+
+def render_invoice(invoice_data):
+    # Runs in a worker process; errors are returned rather than raised so one
+    # bad order doesn't take down the whole batch
+    start = time.perf_counter()
+    try:
+        excel_file = generate_invoice_excel(invoice_data).getvalue()
+        pdf_file = generate_invoice_pdf(invoice_data)
+        error = ""
+    except Exception as exc:
+        excel_file = pdf_file = None
+        error = f"{type(exc).__name__}: {exc}"
+    return invoice_data[ORDER_KEY], excel_file, pdf_file, time.perf_counter() - start, error
+
+
+def _archive_name(order_no, used):
+    base = re.sub(r"[^A-Za-z0-9._-]+", "_", str(order_no)).strip("_") or "invoice"
+    name, n = base, 1
+    while name in used:
+        n += 1
+        name = f"{base}_{n}"
+    used.add(name)
+    return name
+
+
+def render_batch(invoices, max_workers=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if max_workers == 1 or len(invoices) < 2:
+        results = list(map(render_invoice, invoices))
+    else:
+        chunksize = max(1, len(invoices) // (max_workers * 4))
+        # Spawned workers: callers such as run_reports start batches from
+        # threads, and forking a multi-threaded process can deadlock
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(render_invoice, invoices, chunksize=chunksize))
+
+    archive = io.BytesIO()
+    report = []
+    used = set()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for order_no, excel_file, pdf_file, seconds, error in results:
+            if not error:
+                name = _archive_name(order_no, used)
+                zf.writestr(f"{name}.xlsx", excel_file)
+                zf.writestr(f"{name}.pdf", pdf_file)
+            report.append({
+                ORDER_KEY: order_no,
+                "Status": "Failed" if error else "OK",
+                "Seconds": round(seconds, 4),
+                "Error": error,
+            })
+    report = pd.DataFrame(report, columns=[ORDER_KEY, "Status", "Seconds", "Error"])
+    report.attrs["wall_seconds"] = time.perf_counter() - start
+    archive.seek(0)
+    return archive.getvalue(), report
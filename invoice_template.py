@@ -0,0 +1,141 @@
+import copy
+import io
+import os
+import threading
+
+# Declarative field-to-cell map for invoice_template2.xlsx. Item rows run from
+# first_row to last_row; longer item lists get extra rows inserted below
+# last_row so the Incoterms/Weight block moves down instead of being overwritten.
+INVOICE_TEMPLATE = {
+    "path": "invoice_template2.xlsx",
+    "fields": {
+        "Sales Order No": "I6",
+        "Date": "I7",
+        "Bill To": "B10",
+        "Ship To": "B14",
+        "Importer of Record": "B17",
+        "Special Instructions": "B25",
+        "Incoterms": "B35",
+        "Total Weight": "B38",
+        "Mode": "B42",
+        "Freight Forwarder": "B44",
+    },
+    "items": {
+        "first_row": 30,
+        "last_row": 32,
+        "columns": {"Description": "B", "Quantity": "G", "Unit Price": "H", "Total Price": "I"},
+    },
+}
+
+_cache = {}
+
+
+def _cell(coordinate):
+    from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+
+    column, row = coordinate_from_string(coordinate)
+    return row, column_index_from_string(column)
+
+
+class CompiledTemplate:
+    def __init__(self, spec):
+        import openpyxl
+        from openpyxl.utils.cell import column_index_from_string
+
+        self.spec = spec
+        self.workbook = openpyxl.load_workbook(spec["path"])
+        self.sheet = self.workbook.active
+        self.lock = threading.Lock()
+        items = spec["items"]
+        self.first_row = items["first_row"]
+        self.last_row = items["last_row"]
+        self.fields = {name: _cell(coord) for name, coord in spec["fields"].items()}
+        self.item_columns = {name: column_index_from_string(col) for name, col in items["columns"].items()}
+
+    def clone(self):
+        from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+
+        # Copying the parsed sheet inside the cached workbook shares its
+        # stylesheet and avoids re-reading and re-parsing the template file
+        ws = self.workbook.copy_worksheet(self.sheet)
+        ws.merged_cells = MultiCellRange([CellRange(rng.coord) for rng in self.sheet.merged_cells.ranges])
+        ws.views = copy.deepcopy(self.sheet.views)
+        ws.HeaderFooter = copy.deepcopy(self.sheet.HeaderFooter)
+        ws.print_title_rows = self.sheet.print_title_rows
+        ws.print_area = self.sheet.print_area
+        return ws
+
+    def _insert_item_rows(self, ws, count):
+        from openpyxl.worksheet.cell_range import CellRange
+        from openpyxl.utils.cell import coordinate_from_string
+
+        at = self.last_row + 1
+        style_row = self.last_row
+        heights = {r: dim.height for r, dim in ws.row_dimensions.items() if r >= at}
+
+        # openpyxl moves cell values and styles but not merges, row heights or the print area
+        merged = [rng for rng in ws.merged_cells.ranges if rng.min_row >= at]
+        for rng in merged:
+            ws.merged_cells.remove(rng)
+        ws.insert_rows(at, count)
+        for rng in merged:
+            rng.shift(0, count)
+            ws.merged_cells.add(rng)
+
+        for r in sorted(heights, reverse=True):
+            ws.row_dimensions[r + count].height = heights[r]
+        for r in range(at, at + count):
+            ws.row_dimensions[r].height = ws.row_dimensions[style_row].height
+            for col in range(1, ws.max_column + 1):
+                source = ws.cell(style_row, col)
+                if source.has_style:
+                    ws.cell(r, col)._style = copy.copy(source._style)
+
+        if ws.print_area:
+            area = ws.print_area[0] if isinstance(ws.print_area, list) else ws.print_area
+            sheet, cells = area.rsplit("!", 1)
+            start, end = cells.replace("$", "").split(":")
+            end_col, end_row = coordinate_from_string(end)
+            ws.print_area = f"{start}:{end_col}{end_row + count}"
+
+    def _save(self, ws):
+        # Save a workbook holding only the rendered sheet
+        output = io.BytesIO()
+        self.workbook._sheets = [ws]
+        ws.title = self.sheet.title
+        self.workbook.save(output)
+        output.seek(0)
+        return output
+
+    def render(self, invoice_data):
+        items = invoice_data.get("Items", [])
+        extra = max(0, len(items) - (self.last_row - self.first_row + 1))
+        with self.lock:
+            try:
+                ws = self.clone()
+                if extra:
+                    self._insert_item_rows(ws, extra)
+
+                for name, (row, col) in self.fields.items():
+                    if row > self.last_row:
+                        row += extra
+                    ws.cell(row, col).value = invoice_data.get(name, "")
+
+                for index, item in enumerate(items):
+                    for name, col in self.item_columns.items():
+                        ws.cell(self.first_row + index, col).value = item.get(name, "")
+
+                return self._save(ws)
+            finally:
+                # Leave the cached workbook holding just the pristine template sheet
+                self.workbook._sheets = [self.sheet]
+
+
+def load_template(spec=INVOICE_TEMPLATE):
+    # Parsed once per process (and again only if the template file changes)
+    path = spec["path"]
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+    template = _cache.get(key)
+    if template is None:
+        template = _cache[key] = CompiledTemplate(spec)
+    return template
@@ -0,0 +1,40 @@
+# pdfplumber, openpyxl and fpdf load on first use, not when the app starts
+from invoice_template import load_template
+from order_extract import extract_sales_order
+
+def extract_invoice_details(pdf_file):
+    # Pages are extracted once each (in parallel for long orders) and the
+    # parsed result is cached by file content hash
+    return extract_sales_order(pdf_file)
+
+def generate_invoice_excel(invoice_data):
+    # Field-to-cell layout lives in invoice_template.INVOICE_TEMPLATE; the
+    # template is parsed once and cloned for each invoice
+    return load_template().render(invoice_data)
+
+def generate_invoice_pdf(invoice_data):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", style='B', size=14)
+    pdf.cell(200, 10, "Commercial Invoice", ln=True, align='C')
+    pdf.ln(10)
+    pdf.set_font("Arial", size=12)
+    
+    for key, value in invoice_data.items():
+        if key != "Items":
+            pdf.cell(200, 10, f"{key}: {value}", ln=True)
+    
+    pdf.ln(10)
+    pdf.cell(200, 10, "Items:", ln=True)
+    for item in invoice_data["Items"]:
+        pdf.cell(200, 10, f"{item['Description']} - Qty: {item['Quantity']} - Unit Price: {item['Unit Price']} - Total: {item['Total Price']}", ln=True)
+    
+    return pdf_bytes(pdf)
+
+def pdf_bytes(pdf):
+    # fpdf 1.x returns a latin-1 str for dest='S', fpdf2 returns a bytearray
+    data = pdf.output(dest='S')
+    return data.encode('latin-1') if isinstance(data, str) else bytes(data)
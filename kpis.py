@@ -0,0 +1,29 @@
+import pandas as pd
+
+ORDER_STATUSES = ["Completed", "Pending", "Cancelled"]
+RATE_STATUSES = ["Completed", "Cancelled"]
+
+
+def encode_status(df, statuses=ORDER_STATUSES):
+    # Store OrderStatus as a categorical so comparisons and groupbys run on
+    # small integer codes instead of Python string objects
+    if isinstance(df["OrderStatus"].dtype, pd.CategoricalDtype):
+        return df
+    extra = sorted(set(df["OrderStatus"].dropna().unique()) - set(statuses))
+    status = pd.Categorical(df["OrderStatus"], categories=list(statuses) + extra)
+    return df.assign(OrderStatus=status)
+
+
+def status_flags(df, statuses=RATE_STATUSES):
+    status = encode_status(df)["OrderStatus"]
+    return pd.DataFrame({s: (status == s).to_numpy() for s in statuses}, index=df.index)
+
+
+def status_rates(df, by, statuses=RATE_STATUSES, percent=True):
+    # Completion/cancellation rates for any grouping key as one native groupby
+    # over boolean columns: the mean of a boolean column is its rate
+    keys = [by] if isinstance(by, str) else list(by)
+    flags = status_flags(df, statuses)
+    rates = flags.groupby([df[k] for k in keys], observed=True, sort=True).mean()
+    rates.columns = [f"{s} Rate" for s in statuses]
+    return rates * 100 if percent else rates
@@ -0,0 +1,194 @@
+import hashlib
+import io
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+HEADER_FIELDS = [
+    "Sales Order No", "Date", "Bill To", "Ship To", "Importer of Record",
+    "Special Instructions", "Incoterms", "Mode", "Freight Forwarder", "Total Weight",
+]
+
+# Single-line "Label: value" fields
+FIELD_PATTERNS = {
+    "Sales Order No": re.compile(r"Sales\s*Order\s*(?:No\.?|Number|#)\s*[:#]?\s*([A-Za-z0-9][\w/-]*)", re.I),
+    "Date": re.compile(r"(?:Order\s*)?\bDate\s*:?\s*(\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}|[A-Za-z]{3,9}\.? \d{1,2},? \d{4})", re.I),
+    "Importer of Record": re.compile(r"Importer\s+of\s+Record\s*:?[ \t]*(.+)", re.I),
+    "Special Instructions": re.compile(r"Special\s+Instructions\s*:?[ \t]*(.+)", re.I),
+    "Incoterms": re.compile(r"Incoterms?\s*:?[ \t]*(.+)", re.I),
+    "Mode": re.compile(r"\bMode(?:\s+of\s+Transport)?\s*:?[ \t]*(.+)", re.I),
+    "Freight Forwarder": re.compile(r"Freight\s+Forwarder\s*:?[ \t]*(.+)", re.I),
+    "Total Weight": re.compile(r"Total\s+Weight\s*:?[ \t]*(.+)", re.I),
+}
+# Multi-line address blocks: the label line plus the lines that follow it
+BLOCK_PATTERNS = {
+    "Bill To": re.compile(r"^\s*Bill\s+To\s*:?[ \t]*(.*)$", re.I),
+    "Ship To": re.compile(r"^\s*Ship\s+To\s*:?[ \t]*(.*)$", re.I),
+}
+ANY_LABEL = re.compile(
+    r"^\s*(Bill\s+To|Ship\s+To|Importer\s+of\s+Record|Special\s+Instructions|Incoterms?|Mode\b|"
+    r"Freight\s+Forwarder|Total\s+Weight|Sales\s*Order|Date\b|Item\b|Description\b)", re.I)
+ITEM_LINE = re.compile(r"^(?:\d+\s+)?(.+?)\s+(\d+(?:\.\d+)?)\s+\$?([\d,]+(?:\.\d+)?)\s+\$?([\d,]+(?:\.\d+)?)\s*$")
+NUMBER = re.compile(r"-?[\d,]*\.?\d+")
+
+ITEM_COLUMNS = {
+    "Description": ("description", "item description", "product"),
+    "Quantity": ("qty", "quantity"),
+    "Unit Price": ("unit price", "price", "unit cost", "rate"),
+    "Total Price": ("total price", "total", "amount", "extended"),
+}
+BLOCK_LINES = 4
+PARALLEL_PAGES = 4
+CACHE_SIZE = 32
+
+_cache = OrderedDict()
+
+
+def _extract_pages(pdf_bytes, page_numbers):
+    # Worker: open the document from bytes and extract text and tables once per page
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for number in page_numbers:
+            page = pdf.pages[number]
+            pages.append((number, page.extract_text() or "", page.extract_tables() or []))
+    return pages
+
+
+def extract_pages(pdf_bytes, max_workers=None):
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        page_count = len(pdf.pages)
+    max_workers = min(max_workers or os.cpu_count() or 1, page_count)
+    if page_count < PARALLEL_PAGES or max_workers < 2:
+        return _extract_pages(pdf_bytes, range(page_count))
+
+    batches = [list(range(page_count))[i::max_workers] for i in range(max_workers)]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_extract_pages, [pdf_bytes] * len(batches), batches)
+        return sorted((page for batch in results for page in batch), key=lambda page: page[0])
+
+
+def _parse_number(value):
+    if value is None:
+        return None
+    match = NUMBER.search(str(value).replace("$", ""))
+    if not match:
+        return None
+    number = float(match.group().replace(",", ""))
+    return int(number) if number.is_integer() else number
+
+
+def _parse_fields(lines):
+    data = {}
+    for field, pattern in FIELD_PATTERNS.items():
+        for line in lines:
+            match = pattern.search(line)
+            if match and match.group(1).strip():
+                data[field] = match.group(1).strip()
+                break
+
+    for field, pattern in BLOCK_PATTERNS.items():
+        for index, line in enumerate(lines):
+            match = pattern.match(line)
+            if not match:
+                continue
+            block = [match.group(1).strip()] if match.group(1).strip() else []
+            for following in lines[index + 1:index + 1 + BLOCK_LINES]:
+                if not following.strip() or ANY_LABEL.match(following):
+                    break
+                block.append(following.strip())
+            data[field] = "\n".join(block)
+            break
+    return data
+
+
+def _match_columns(header):
+    header = [str(cell or "").strip().lower() for cell in header]
+    columns = {}
+    for field, names in ITEM_COLUMNS.items():
+        for name in names:
+            hits = [i for i, cell in enumerate(header) if cell == name or cell.startswith(name)]
+            hits = [i for i in hits if i not in columns.values()]
+            if hits:
+                columns[field] = hits[0]
+                break
+    return columns
+
+
+def _item(description, quantity, unit_price, total_price):
+    if total_price is None and quantity is not None and unit_price is not None:
+        total_price = quantity * unit_price
+    return {"Description": description, "Quantity": quantity, "Unit Price": unit_price, "Total Price": total_price}
+
+
+def _parse_table_items(tables):
+    items = []
+    for table in tables:
+        if not table:
+            continue
+        columns = _match_columns(table[0])
+        if "Description" not in columns or "Quantity" not in columns:
+            continue
+        for row in table[1:]:
+            description = str(row[columns["Description"]] or "").strip()
+            if not description or description.lower().startswith("total"):
+                continue
+            cell = lambda field: row[columns[field]] if field in columns else None
+            items.append(_item(description, _parse_number(cell("Quantity")),
+                               _parse_number(cell("Unit Price")), _parse_number(cell("Total Price"))))
+    return items
+
+
+def _parse_text_items(lines):
+    # Fallback for PDFs without ruled tables: "description qty unit total" lines
+    # between the item header and the next label
+    items = []
+    in_items = False
+    for line in lines:
+        if re.search(r"\bDescription\b", line, re.I) and re.search(r"\bQ(?:ty|uantity)\b", line, re.I):
+            in_items = True
+            continue
+        if not in_items:
+            continue
+        match = ITEM_LINE.match(line.strip())
+        if match:
+            description, quantity, unit_price, total_price = match.groups()
+            items.append(_item(description.strip(), _parse_number(quantity),
+                               _parse_number(unit_price), _parse_number(total_price)))
+        elif ANY_LABEL.match(line) or line.strip().lower().startswith("total"):
+            in_items = False
+    return items
+
+
+def parse_sales_order(pages):
+    lines = [line for _, text, _ in pages for line in text.splitlines()]
+    invoice_data = {field: "" for field in HEADER_FIELDS}
+    invoice_data.update(_parse_fields(lines))
+    tables = [table for _, _, page_tables in pages for table in page_tables]
+    invoice_data["Items"] = _parse_table_items(tables) or _parse_text_items(lines)
+    return invoice_data
+
+
+def extract_sales_order(pdf_file, max_workers=None):
+    # Parsed results are cached by content hash, so a re-upload or a rerun
+    # returns the earlier result without opening the PDF again
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    if hasattr(pdf_file, "read"):
+        pdf_bytes = pdf_file.read()
+    else:
+        with open(pdf_file, "rb") as f:
+            pdf_bytes = f.read()
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    if digest in _cache:
+        _cache.move_to_end(digest)
+    else:
+        _cache[digest] = parse_sales_order(extract_pages(pdf_bytes, max_workers))
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    result = _cache[digest]
+    return {**result, "Items": [dict(item) for item in result["Items"]]}
@@ -0,0 +1,189 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from aggregates import build_cube, mean, monthly_totals, rollup, status_counts
+from baseline_forecast import backtest, forecast_all, forecast_frame, monthly_matrix
+from data_loader import atomic_write, load_fact_sales, source_version
+from exports import EXPORT_FORMATS, export_file, view_version, write_export
+from ingest import STORE_DIR, load_store, load_store_cube, store_exists, store_version, sync_seed
+
+DEFAULT_OUT = "reports"
+DEFAULT_SALES = "order_fulfillment_dashboard_updated.xlsx"
+
+
+def _write_table(df, out_dir, name, fmt):
+    ext, _ = EXPORT_FORMATS[fmt]
+    return atomic_write(os.path.join(out_dir, f"{name}{ext}"), lambda p: write_export(df, p, fmt))
+
+
+def _write_bytes(data, out_dir, file_name):
+    def write(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return atomic_write(os.path.join(out_dir, file_name), write)
+
+
+def _load_sales(file_path=None):
+    # The given workbook (through its Parquet cache), or with no path the
+    # appended store, so a run never silently reports on other data
+    if file_path is None:
+        if not store_exists():
+            raise FileNotFoundError(f"No appended FactSales store in {STORE_DIR}")
+        # Like the dashboard, pick up a replaced seed workbook first
+        if sync_seed():
+            print(f"Seed workbook changed; rebuilt {STORE_DIR} and re-applied the appended orders", file=sys.stderr)
+        return load_store(), store_version(), load_store_cube()
+    df = load_fact_sales(file_path)
+    return df, source_version(file_path), build_cube(df)
+
+
+def sales_job(file_path, out_dir, fmt="CSV", horizon=3, warm_cache=True):
+    # Monthly metrics, warehouse KPIs and baseline forecasts from the cube,
+    # plus the unfiltered "Download Reports" export in the app's cache
+    from sales_index import SalesIndex
+
+    df, data_version, cube = _load_sales(file_path)
+    written = [_write_table(monthly_totals(cube), out_dir, "monthly_metrics", fmt)]
+
+    warehouse_totals = rollup(cube, "WarehouseID")
+    warehouse_status = status_counts(cube, "WarehouseID")
+    kpis = pd.DataFrame({
+        "Orders": warehouse_totals["count"],
+        "TotalSales": warehouse_totals["TotalSales_sum"],
+        "ProcessingTime": mean(warehouse_totals, "ProcessingTime"),
+        "Cancellation Rate": warehouse_status.get("Cancelled", 0) / warehouse_status.sum(axis=1) * 100,
+    }).reset_index()
+    written.append(_write_table(kpis, out_dir, "warehouse_kpis", fmt))
+
+    warehouses, months, history = monthly_matrix(cube)
+    forecasts = pd.concat(
+        {method: forecast_frame(warehouses, months, forecast) for method, forecast in forecast_all(history, horizon).items()},
+        names=["Method"],
+    ).reset_index()
+    written.append(_write_table(forecasts, out_dir, "baseline_forecast", fmt))
+    written.append(_write_table(backtest(history, horizon), out_dir, "baseline_backtest", fmt))
+
+    if warm_cache:
+        index = SalesIndex(df)
+        version = view_version(data_version, *index.date_range, index.warehouses, index.statuses)
+        written.append(export_file(df, "sales_report", version, fmt))
+    return written
+
+
+def smartway_job(shipments_file, out_dir, factors_file=None):
+    from shipments import summarize_shipments
+    from smartway import read_factor_table, report_excel, report_pdf, smartway_report
+
+    summary = summarize_shipments(shipments_file)
+    carrier_totals = summary.carrier_totals()
+    factors = read_factor_table(factors_file) if factors_file else None
+    rollups = smartway_report(summary, factors) or {}
+    return [
+        _write_bytes(report_excel(carrier_totals, rollups), out_dir, "smartway_report.xlsx"),
+        _write_bytes(report_pdf(carrier_totals, rollups), out_dir, "smartway_report.pdf"),
+    ]
+
+
+def forecast_job(sales_file, out_dir, periods=12, model_type="ARIMA", group_col=None, value_col="Sales"):
+    from forecasting import forecast_excel, forecast_many, monthly_series
+
+    data = pd.read_csv(sales_file, parse_dates=["Date"], index_col="Date")
+    forecast = forecast_many(monthly_series(data, value_col, group_col), periods, model_type)
+    return [_write_bytes(forecast_excel(forecast), out_dir, "forecast_report.xlsx")]
+
+
+def invoice_job(orders_file, out_dir, items_file=None, max_workers=None):
+    from invoice_batch import load_batch, render_batch
+
+    zip_bytes, report = render_batch(load_batch(orders_file, items_file), max_workers=max_workers)
+    return [
+        _write_bytes(zip_bytes, out_dir, "invoices.zip"),
+        _write_table(report, out_dir, "invoice_report", "CSV"),
+    ]
+
+
+def _run(name, job, kwargs):
+    start = time.perf_counter()
+    try:
+        return name, job(**kwargs), time.perf_counter() - start, ""
+    except Exception as exc:
+        return name, [], time.perf_counter() - start, f"{type(exc).__name__}: {exc}"
+
+
+def run_jobs(jobs, max_workers=None):
+    # Jobs are independent and mostly wait on NumPy, pyarrow or their own
+    # process pools, so threads are enough to overlap them; a failing job is
+    # reported without stopping the others
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as pool:
+        futures = [pool.submit(_run, name, job, kwargs) for name, job, kwargs in jobs]
+        return [future.result() for future in futures]
+
+
+def build_jobs(args):
+    jobs = []
+    if args.sales or args.store:
+        jobs.append(("sales", sales_job, dict(
+            file_path=None if args.store else args.sales, out_dir=os.path.join(args.out, "sales"), fmt=args.format,
+            horizon=args.horizon, warm_cache=not args.no_cache)))
+    if args.shipments:
+        jobs.append(("smartway", smartway_job, dict(
+            shipments_file=args.shipments, out_dir=os.path.join(args.out, "smartway"), factors_file=args.factors)))
+    if args.forecast:
+        jobs.append(("forecast", forecast_job, dict(
+            sales_file=args.forecast, out_dir=os.path.join(args.out, "forecast"), periods=args.periods,
+            model_type=args.model, group_col=args.group_col)))
+    if args.orders:
+        jobs.append(("invoices", invoice_job, dict(
+            orders_file=args.orders, out_dir=os.path.join(args.out, "invoices"), items_file=args.items,
+            max_workers=args.workers)))
+    return jobs
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate dashboard, SmartWay, forecast and invoice reports without Streamlit.")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="output directory (one subdirectory per job)")
+    parser.add_argument("--workers", type=int, default=None, help="max concurrent jobs and invoice worker processes")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--sales", nargs="?", const=DEFAULT_SALES, help="FactSales workbook for monthly metrics, KPIs and baseline forecasts")
+    source.add_argument("--store", action="store_true", help="same sales reports from the appended FactSales store (what the dashboard shows after Append Orders)")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="CSV", help="format for tabular outputs")
+    parser.add_argument("--horizon", type=int, default=3, help="months ahead for baseline forecasts")
+    parser.add_argument("--no-cache", action="store_true", help="don't prebuild the dashboard's sales report export")
+    parser.add_argument("--shipments", help="shipments CSV/XLSX for the SmartWay report")
+    parser.add_argument("--factors", help="carrier emissions factor table (CSV/XLSX)")
+    parser.add_argument("--forecast", help="daily sales CSV (Date, Sales) for ARIMA/Prophet forecasts")
+    parser.add_argument("--periods", type=int, default=12, help="months ahead for ARIMA/Prophet forecasts")
+    parser.add_argument("--model", choices=["ARIMA", "Prophet"], default="ARIMA")
+    parser.add_argument("--group-col", help="forecast one series per value of this column")
+    parser.add_argument("--orders", help="orders file for the invoice batch")
+    parser.add_argument("--items", help="separate line-items file for the invoice batch")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = build_jobs(args)
+    if not jobs:
+        print("Nothing to do: pass --sales/--store, --shipments, --forecast and/or --orders", file=sys.stderr)
+        return 2
+    failed = 0
+    for name, paths, seconds, error in run_jobs(jobs, args.workers):
+        if error:
+            failed += 1
+            print(f"{name}: FAILED after {seconds:.2f}s ({error})", file=sys.stderr)
+            continue
+        print(f"{name}: {len(paths)} files in {seconds:.2f}s")
+        for path in paths:
+            print(f"  {path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from aggregates import build_cube
+from kpis import encode_status
+
+CACHE_SIZE = 16
+
+
+class SalesIndex:
+    # Rows sorted by Date so a date range is two binary searches, plus the
+    # sorted row positions of every warehouse and status code per row, so a
+    # filtered view only gathers the rows it returns
+    def __init__(self, df):
+        df = encode_status(df)
+        # A frame that is already in Date order (e.g. the shared memory-mapped
+        # one) is used as is rather than copied
+        if not df["Date"].is_monotonic_increasing:
+            df = df.sort_values("Date", kind="stable", ignore_index=True)
+        self.df = df
+        self.dates = df["Date"].to_numpy()
+        self.status_codes = df["OrderStatus"].cat.codes.to_numpy()
+        self.statuses = list(df["OrderStatus"].cat.categories)
+        self.warehouse_rows = {key: np.asarray(rows) for key, rows in df.groupby("WarehouseID").indices.items()}
+        self.warehouses = sorted(self.warehouse_rows)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def nbytes(self):
+        # Memory this index holds beyond its frame: the frame is usually the
+        # shared memory-mapped one, already counted as a store entry
+        own = sum(rows.nbytes for rows in self.warehouse_rows.values())
+        with self._lock:
+            cached = list(self._cache.values())
+        return own + sum(rows.nbytes + int(cube.memory_usage(index=True).sum()) for rows, cube in cached)
+
+    @property
+    def date_range(self):
+        return pd.Timestamp(self.dates[0]).date(), pd.Timestamp(self.dates[-1]).date()
+
+    def positions(self, start=None, end=None, warehouses=None, statuses=None):
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)), side="left")
+        hi = len(self.dates) if end is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)), side="left")
+
+        if warehouses is None:
+            rows = np.arange(lo, hi)
+        else:
+            # Each warehouse's positions are sorted, so the date range is a
+            # binary search into each array rather than a scan of the frame
+            parts = []
+            for key in warehouses:
+                wh_rows = self.warehouse_rows.get(key)
+                if wh_rows is not None:
+                    parts.append(wh_rows[np.searchsorted(wh_rows, lo):np.searchsorted(wh_rows, hi)])
+            rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+        if statuses is not None and set(statuses) != set(self.statuses):
+            codes = [self.statuses.index(s) for s in statuses if s in self.statuses]
+            rows = rows[np.isin(self.status_codes[rows], codes)]
+        return rows
+
+    def slice(self, start=None, end=None, warehouses=None, statuses=None):
+        # Filtered rows and their aggregate cube. Only the row positions and
+        # the (small) cube are memoized per filter tuple, with LRU eviction;
+        # the rows themselves are gathered per call, so cached filters never
+        # hold copies of the frame
+        key = (start, end,
+               None if warehouses is None else tuple(sorted(warehouses)),
+               None if statuses is None else tuple(sorted(statuses)))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            rows, cube = cached
+            return self.df.take(rows), cube
+
+        rows = self.positions(start, end, warehouses, statuses)
+        df = self.df.take(rows)
+        cube = build_cube(df)
+        if len(self.dates) < 2**31:
+            rows = rows.astype(np.int32)
+        with self._lock:
+            self._cache[key] = (rows, cube)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return df, cube
@@ -0,0 +1,173 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from kpis import encode_status
+
+# Months are held as int16 period codes (months since 1970-01), two bytes a
+# row instead of a Python string; cubes and exports turn them back into labels
+MONTH_DTYPE = "int16"
+# Part of every cache key built from compact frames (Parquet cache, shared
+# Arrow files, exports); bump it whenever a column's storage dtype changes
+SCHEMA_VERSION = 3
+
+# Column -> storage kind:
+#   "numeric"  integers downcast to the smallest integer type, floats to float32
+#   "money"    floats kept at float64, so amounts and exports match the source
+#              to the cent; whole-number amounts are downcast like "numeric"
+#   "category" categorical labels; numeric IDs are downcast and stay numeric
+#   "status"   categorical in the dashboard's OrderStatus order
+#   "month"    int16 period code, taken from Date when present
+#   "datetime" left as is
+FACT_SALES_SCHEMA = {
+    "SalesID": "numeric",
+    "Date": "datetime",
+    "ProductID": "numeric",
+    "CustomerID": "numeric",
+    "WarehouseID": "category",
+    "QuantitySold": "numeric",
+    "UnitPrice": "money",
+    "ShippingCost": "money",
+    "OrderStatus": "status",
+    "TotalSales": "money",
+    "OrderPlacementDate": "datetime",
+    "ProcessingTime": "numeric",
+    "Month": "month",
+}
+
+SHIPMENT_SCHEMA = {
+    "Carrier": "category",
+    "Route": "category",
+    "Mode": "category",
+    "Status": "category",
+    "Actual Weight (kgs)": "numeric",
+    "Transport Distance (km)": "numeric",
+    "Cost": "money",
+    "Distance": "numeric",
+}
+
+
+_READ_DTYPES = {"numeric": "float32", "money": "float64", "category": "category"}
+
+
+def read_dtypes(schema):
+    # The subset of a schema that can be handed to read_csv/astype up front
+    return {col: _READ_DTYPES[kind] for col, kind in schema.items() if kind in _READ_DTYPES}
+
+
+def month_codes(dates):
+    return pd.Series(dates).to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype("int64").astype(MONTH_DTYPE)
+
+
+def month_labels(codes):
+    # "YYYY-MM" for each period code, the same text as .dt.to_period("M").astype(str)
+    return np.asarray(codes, dtype="int64").astype("datetime64[M]").astype(str).astype(object)
+
+
+def decode_months(df, column="Month"):
+    # Readable Month labels for exports; each distinct code is formatted once
+    if column not in df.columns or not pd.api.types.is_integer_dtype(df[column].dtype):
+        return df
+    codes, uniques = pd.factorize(df[column], sort=True)
+    return df.assign(**{column: pd.Categorical.from_codes(codes, month_labels(uniques))})
+
+
+def _numeric(values):
+    # Already-narrow columns (e.g. from the compact Parquet cache) are returned
+    # without another min/max scan
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values if values.dtype.itemsize == 1 else pd.to_numeric(values, downcast="integer")
+    if pd.api.types.is_float_dtype(values.dtype) and values.dtype.itemsize > 4:
+        return values.astype("float32")
+    return values
+
+
+def _money(values):
+    # Whole-number amounts stay integers (downcast like any integer column);
+    # only fractional amounts are pinned to float64
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return _numeric(values)
+    if pd.api.types.is_float_dtype(values.dtype) and values.dtype != "float64":
+        return values.astype("float64")
+    return values
+
+
+def _category(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return _numeric(values)
+    return values.astype("category")
+
+
+def _month(df):
+    values = df["Month"]
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.astype(MONTH_DTYPE, copy=False)
+    if "Date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Date"].dtype):
+        return pd.Series(month_codes(df["Date"]), index=df.index)
+    # Parse each distinct label once, then broadcast the codes back to the rows
+    codes, uniques = pd.factorize(values)
+    ordinals = pd.PeriodIndex(uniques, freq="M").asi8.astype(MONTH_DTYPE)
+    return pd.Series(ordinals[codes], index=df.index)
+
+
+_CONVERTERS = {
+    "numeric": _numeric,
+    "money": _money,
+    "category": _category,
+}
+
+
+def optimize(df, schema=FACT_SALES_SCHEMA):
+    # Returns a copy with every schema column in its compact dtype; columns not
+    # in the schema are untouched and already-compact columns are kept as is
+    columns = {}
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind in _CONVERTERS:
+            compact = _CONVERTERS[kind](df[col])
+        elif kind == "status":
+            compact = encode_status(df[[col]])[col]
+        elif kind == "month":
+            compact = _month(df)
+        else:
+            continue
+        if compact.dtype != df[col].dtype:
+            columns[col] = compact
+    return df.assign(**columns) if columns else df
+
+
+def memory_report(before, after):
+    # Per-column dtype and deep memory before/after, with a TOTAL row
+    old = before.memory_usage(deep=True, index=False)
+    new = after.memory_usage(deep=True, index=False).reindex(old.index)
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.reindex(old.index).astype(str),
+        "bytes_before": old,
+        "bytes_after": new,
+    })
+    report.loc["TOTAL"] = ["", "", old.sum(), new.sum()]
+    report["saved"] = report["bytes_before"] - report["bytes_after"]
+    report["saved_pct"] = (report["saved"] / report["bytes_before"] * 100).round(1)
+    return report
+
+
+def main(argv):
+    # python schemas.py [workbook.xlsx | rows]: bytes saved on a real or synthetic FactSales
+    from data_loader import prepare_fact_sales
+
+    source = argv[0] if argv else "order_fulfillment_dashboard_updated.xlsx"
+    if source.isdigit():
+        from synthetic_data import make_fact_sales
+        raw = make_fact_sales(int(source))
+    else:
+        raw = prepare_fact_sales(pd.read_excel(source, sheet_name="FactSales"))
+    print(memory_report(raw, optimize(raw)).to_string())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
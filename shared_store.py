@@ -0,0 +1,241 @@
+import glob
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from data_loader import CACHE_DIR, atomic_write, file_hash
+from schemas import SCHEMA_VERSION
+
+SHARED_DIR = os.path.join(CACHE_DIR, "shared")
+# Budget for unreferenced entries; datasets a live session holds are never evicted
+MAX_BYTES = int(os.environ.get("SHARED_STORE_MB", "2048")) * 2**20
+
+
+def nbytes(value):
+    # Rough resident size: the buffers of frames and arrays, summed through
+    # containers and plain result objects such as ShipmentSummary. Objects
+    # that share memory with other entries (SalesIndex holds the shared
+    # frame) report their own share through an nbytes() method
+    if callable(getattr(value, "nbytes", None)):
+        return int(value.nbytes())
+    if isinstance(value, (pa.Table, np.ndarray)):
+        return int(value.nbytes)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=False))
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(v) for v in value)
+    if hasattr(value, "__dict__") and not isinstance(value, type):
+        return sum(nbytes(v) for v in vars(value).values())
+    return 0
+
+
+_upload_keys = OrderedDict()
+_upload_lock = threading.Lock()
+
+
+def content_key(file):
+    # Uploads are keyed by a hash of their bytes, paths by file content, so the
+    # same carrier file uploaded in two sessions maps to one entry. An upload
+    # is hashed once; later reruns look it up by its file_id
+    if not hasattr(file, "read"):
+        return file_hash(file)
+    file_id = getattr(file, "file_id", None)
+    with _upload_lock:
+        if file_id in _upload_keys:
+            return _upload_keys[file_id]
+    file.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(1 << 20), b""):
+        digest.update(block)
+    file.seek(0)
+    key = digest.hexdigest()
+    if file_id is not None:
+        with _upload_lock:
+            _upload_keys[file_id] = key
+            if len(_upload_keys) > 256:
+                _upload_keys.popitem(last=False)
+    return key
+
+
+class _Entry:
+    __slots__ = ("value", "size", "refs")
+
+    def __init__(self, value, size):
+        self.value = value
+        self.size = size
+        self.refs = 0
+
+    @property
+    def nbytes(self):
+        # Measured on demand: entries such as SalesIndex grow their own caches
+        return self.size(self.value)
+
+
+class Lease:
+    # A counted reference to one entry; released explicitly or when the
+    # holder (e.g. a finished Streamlit session's state) is garbage collected
+    def __init__(self, store, key, value):
+        self.key = key
+        self.value = value
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    def release(self):
+        self._finalizer()
+
+
+class SharedStore:
+    # Process-wide cache of read-only datasets and aggregates. Each key is
+    # built once even when many sessions ask at the same moment; entries no
+    # session holds are evicted least-recently-used once over max_bytes.
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key, hold):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.refs += hold
+        return entry
+
+    def _get(self, key, build, size, hold):
+        with self._lock:
+            entry = self._lookup(key, hold)
+            if entry is not None:
+                self.hits += 1
+                return entry.value
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key, hold)
+                if entry is not None:
+                    self.hits += 1
+                    return entry.value
+            try:
+                value = build()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                raise
+            with self._lock:
+                self.misses += 1
+                entry = _Entry(value, size)
+                entry.refs += hold
+                self._entries[key] = entry
+                self._building.pop(key, None)
+                self._evict()
+        return value
+
+    def get(self, key, build, size=nbytes):
+        return self._get(key, build, size, 0)
+
+    def acquire(self, key, build, size=nbytes):
+        value = self._get(key, build, size, 1)
+        return Lease(self, key, value)
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+            self._evict()
+
+    def _evict(self):
+        sizes = {key: entry.nbytes for key, entry in self._entries.items()}
+        total = sum(sizes.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if self._entries[key].refs == 0:
+                total -= sizes[key]
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "held": sum(1 for e in self._entries.values() if e.refs),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+store = SharedStore()
+
+
+def arrow_path(name, version, shared_dir=SHARED_DIR):
+    return os.path.join(shared_dir, f"{name}-{version[:16]}.s{SCHEMA_VERSION}.arrow")
+
+
+def write_arrow(df, path):
+    # Uncompressed Arrow IPC, so readers can map the file instead of decoding it
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    def write(tmp_path):
+        with pa.OSFile(tmp_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    atomic_write(path, write)
+
+
+def mapped_frame(name, version, build, shared_dir=SHARED_DIR):
+    # A read-only DataFrame whose columns are views onto a memory-mapped Arrow
+    # file: sessions share one object, and other processes mapping the same
+    # file share its pages through the OS page cache
+    path = arrow_path(name, version, shared_dir)
+    try:
+        table = ipc.open_file(pa.memory_map(path)).read_all()
+    except (OSError, pa.ArrowInvalid):
+        # Missing, or removed by another process between its check and open
+        write_arrow(build(), path)
+        _remove_old(name, path, shared_dir)
+        table = ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+
+def _remove_old(name, path, shared_dir):
+    # Older versions may still be mapped by other sessions. POSIX keeps mapped
+    # pages alive after unlink; Windows refuses, and the file is left for a
+    # later cleanup
+    for old in glob.glob(os.path.join(shared_dir, f"{name}-*.arrow")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def shared_frame(name, version, build):
+    return store.get((name, version), lambda: mapped_frame(name, version, build))
+
+
+def session_lease(slot, key, build, size=nbytes):
+    # Streamlit helper: the session holds one lease per slot, swapped when the
+    # key changes and dropped with the session state, so the shared entry
+    # stays resident exactly as long as some session is viewing it
+    import streamlit as st
+
+    leases = st.session_state.setdefault("_shared_leases", {})
+    lease = leases.get(slot)
+    if lease is None or lease.key != key:
+        if lease is not None:
+            lease.release()
+        leases[slot] = lease = store.acquire(key, build, size)
+    return lease.value
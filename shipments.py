@@ -0,0 +1,217 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from schemas import SHIPMENT_SCHEMA, read_dtypes
+from shared_store import content_key, session_lease
+
+CHUNK_SIZE = 200_000
+KM_TO_MILES = 0.6213
+
+# Narrow dtypes for the shipment columns we know about; anything else is
+# left to pandas' inference
+SHIPMENT_DTYPES = read_dtypes(SHIPMENT_SCHEMA)
+# Pass-through exports keep the uploaded numbers exactly: only the labels
+# are narrowed, floats stay float64 so 12.3 is not written as 12.30000019
+EXPORT_DTYPES = {c: t for c, t in SHIPMENT_DTYPES.items() if t == "category"}
+
+# Carrier x Route x Mode base table that the SmartWay rollups are built from
+LANE_KEYS = ["Carrier", "Route", "Mode"]
+LANE_MEASURES = ["TON-MILE", "TKM", "Actual Weight (kgs)", "Transport Distance (km)"]
+# Blank Route/Mode values are grouped under these rather than dropped, so the
+# lane rollups cover the same shipments as the per-carrier totals
+DEFAULT_MODE = "Truck"
+UNSPECIFIED_LANE = "Unspecified"
+LANE_DEFAULTS = {"Route": UNSPECIFIED_LANE, "Mode": DEFAULT_MODE}
+# Partial sums carry "<column> (count)", the non-null rows behind each sum,
+# so means ignore rows where that column is blank
+COUNT_SUFFIX = " (count)"
+
+
+def count_column(column):
+    return column + COUNT_SUFFIX
+
+
+def _file_name(file):
+    return str(getattr(file, "name", file))
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def _narrow(df, dtypes):
+    return df.astype({c: t for c, t in dtypes.items() if c in df.columns})
+
+
+def _iter_excel(file, chunksize, dtypes):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) == chunksize:
+                yield _narrow(pd.DataFrame(buffer, columns=header), dtypes)
+                buffer = []
+        if buffer:
+            yield _narrow(pd.DataFrame(buffer, columns=header), dtypes)
+    finally:
+        wb.close()
+
+
+def iter_chunks(file, chunksize=CHUNK_SIZE, dtypes=SHIPMENT_DTYPES):
+    # Yield the upload in bounded chunks so peak memory doesn't grow with the file
+    _rewind(file)
+    if _file_name(file).endswith(".xlsx"):
+        yield from _iter_excel(file, chunksize, dtypes)
+        return
+
+    header = pd.read_csv(file, nrows=0).columns
+    _rewind(file)
+    dtypes = {c: t for c, t in dtypes.items() if c in header}
+    yield from pd.read_csv(file, chunksize=chunksize, dtype=dtypes)
+
+
+def add_ton_miles(chunk):
+    if "Actual Weight (kgs)" in chunk.columns and "Transport Distance (km)" in chunk.columns:
+        # Multiply in float64: the float32 inputs keep the chunk small, but
+        # products of weights and distances need the extra precision
+        tkm = (chunk["Actual Weight (kgs)"].astype("float64") * chunk["Transport Distance (km)"]) / 1000
+        chunk["TKM"] = tkm.round(2)
+        chunk["TON-MILE"] = (tkm * KM_TO_MILES).round(2)
+    return chunk
+
+
+def add_cost_per_mile(chunk):
+    if "Cost" in chunk.columns and "Distance" in chunk.columns:
+        chunk["Cost per Mile"] = chunk["Cost"] / chunk["Distance"]
+    return chunk
+
+
+def _partial_sums(chunk, keys, columns):
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    columns = [c for c in columns if c in chunk.columns]
+    keys = [k for k in keys if k in chunk.columns]
+    if not keys or not columns:
+        return None
+    values = chunk[columns].astype("float64")
+    grouped = values.groupby([chunk[k] for k in keys], observed=True, sort=False)
+    sums = grouped.sum()
+    counts = grouped.count()
+    sums[[count_column(c) for c in columns]] = counts.to_numpy()
+    sums["Rows"] = grouped.size()
+    # Per-chunk categoricals carry their own categories, so relabel the
+    # (small) result with plain strings before combining across chunks
+    if len(keys) == 1:
+        sums.index = sums.index.astype(str)
+    else:
+        sums.index = pd.MultiIndex.from_arrays(
+            [sums.index.get_level_values(i).astype(str) for i in range(len(keys))], names=keys)
+    return sums
+
+
+def _fill_keys(chunk, defaults):
+    filled = {}
+    for col, default in defaults.items():
+        if col in chunk.columns and chunk[col].hasnans:
+            values = chunk[col]
+            if isinstance(values.dtype, pd.CategoricalDtype) and default not in values.cat.categories:
+                values = values.cat.add_categories([default])
+            filled[col] = values.fillna(default)
+    return chunk.assign(**filled) if filled else chunk
+
+
+def _combine(running, partial):
+    if partial is None:
+        return running
+    if running is None:
+        return partial
+    return running.add(partial, fill_value=0)
+
+
+class ShipmentSummary:
+    def __init__(self):
+        self.preview = None
+        self.rows = 0
+        self.carrier = None
+        self.route = None
+        self.status = None
+        self.lanes = None
+
+    def update(self, chunk):
+        if self.preview is None:
+            self.preview = chunk.head()
+        self.rows += len(chunk)
+        self.carrier = _combine(self.carrier, _partial_sums(chunk, "Carrier", ["TON-MILE", "TKM"]))
+        self.route = _combine(self.route, _partial_sums(chunk, "Route", ["Cost per Mile", "Cost", "Distance"]))
+        self.lanes = _combine(self.lanes, _partial_sums(_fill_keys(chunk, LANE_DEFAULTS), LANE_KEYS, LANE_MEASURES))
+        if "Status" in chunk.columns:
+            # Missing statuses are not counted, and unused categories dropped
+            counts = chunk["Status"].value_counts()
+            counts = counts[counts > 0]
+            counts.index = counts.index.astype(str)
+            self.status = counts if self.status is None else self.status.add(counts, fill_value=0)
+
+    def carrier_totals(self):
+        # Same shape as app4's pivot_table: Carrier, TON-MILE, TKM
+        if self.carrier is None:
+            return pd.DataFrame(columns=["Carrier", "TON-MILE", "TKM"])
+        totals = self.carrier[["TON-MILE", "TKM"]].round(2).sort_index()
+        return totals.rename_axis("Carrier").reset_index()
+
+    def route_cost_per_mile(self):
+        if self.route is None or "Cost per Mile" not in self.route.columns:
+            return pd.Series(dtype="float64", name="Cost per Mile")
+        route = self.route.sort_index().rename_axis("Route")
+        return (route["Cost per Mile"] / route[count_column("Cost per Mile")]).rename("Cost per Mile")
+
+    def status_counts(self):
+        if self.status is None:
+            return pd.Series(dtype="int64", name="count")
+        return self.status.astype("int64").sort_values(ascending=False)
+
+
+def summarize_shipments(file, chunksize=CHUNK_SIZE):
+    summary = ShipmentSummary()
+    for chunk in iter_chunks(file, chunksize):
+        summary.update(add_cost_per_mile(add_ton_miles(chunk)))
+    return summary
+
+
+def load_shipments(file):
+    # Streamlit helper for the shipment apps: the upload is streamed in chunks
+    # into one summary, keyed by the file's content hash, so every session
+    # that uploads the same file shares it instead of re-parsing it
+    return session_lease("shipments", ("shipments", content_key(file)), lambda: summarize_shipments(file))
+
+
+def write_shipments_excel(file, sheet_name, transform=None, chunksize=CHUNK_SIZE):
+    # Stream the transformed rows into an XLSX without materialising the frame;
+    # xlsxwriter's constant_memory mode flushes each row as it is written
+    import xlsxwriter
+
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {"constant_memory": True, "nan_inf_to_errors": True})
+    ws = wb.add_worksheet(sheet_name)
+    row_idx = 0
+    for chunk in iter_chunks(file, chunksize, EXPORT_DTYPES):
+        if transform is not None:
+            chunk = transform(chunk)
+        if row_idx == 0:
+            ws.write_row(0, 0, list(chunk.columns))
+            row_idx = 1
+        values = chunk.astype(object).where(chunk.notna(), None).to_numpy()
+        for row in values:
+            ws.write_row(row_idx, 0, [v.item() if isinstance(v, np.generic) else v for v in row])
+            row_idx += 1
+    wb.close()
+    output.seek(0)
+    return output
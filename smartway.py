@@ -0,0 +1,157 @@
+import io
+
+import pandas as pd
+
+from shipments import DEFAULT_MODE, KM_TO_MILES, UNSPECIFIED_LANE, count_column
+
+POLLUTANTS = ["CO2", "NOx", "PM2.5"]
+FACTOR_COLUMNS = [f"{p} (g/ton-mile)" for p in POLLUTANTS]
+
+# Fallback g/ton-mile factors for carriers missing from the uploaded factor
+# table. These are placeholders in the range of published fleet averages;
+# load the carriers' own SmartWay performance data for real reporting.
+DEFAULT_MODE_FACTORS = pd.DataFrame({
+    "Mode": ["Truck", "Rail", "Intermodal", "Air", "Ocean"],
+    "CO2 (g/ton-mile)": [161.8, 21.3, 60.0, 1080.0, 15.0],
+    "NOx (g/ton-mile)": [0.52, 0.18, 0.30, 3.20, 0.35],
+    "PM2.5 (g/ton-mile)": [0.018, 0.005, 0.010, 0.030, 0.020],
+}).set_index("Mode")
+
+
+def read_factor_table(file):
+    # Carrier factor table: Carrier, optional Mode, and g/ton-mile factors
+    name = str(getattr(file, "name", file))
+    factors = pd.read_excel(file) if name.endswith(".xlsx") else pd.read_csv(file)
+    missing = [c for c in ["Carrier"] + FACTOR_COLUMNS if c not in factors.columns]
+    if missing:
+        raise ValueError(f"Factor table is missing columns: {', '.join(missing)}")
+    keys = ["Carrier", "Mode"] if "Mode" in factors.columns else ["Carrier"]
+    factors = factors[keys + FACTOR_COLUMNS].drop_duplicates(keys, keep="last")
+    return factors.astype({k: "category" for k in keys})
+
+
+def lane_table(lanes):
+    # Normalise ShipmentSummary.lanes into one Carrier x Route x Mode frame
+    # with categorical keys; missing Route/Mode columns get a single default
+    base = lanes.reset_index()
+    if "Route" not in base.columns:
+        base["Route"] = UNSPECIFIED_LANE
+    if "Mode" not in base.columns:
+        base["Mode"] = DEFAULT_MODE
+    base = base.astype({"Carrier": "category", "Route": "category", "Mode": "category"})
+    base["Payload (tons)"] = base["Actual Weight (kgs)"] / 1000
+    base["Payload Rows"] = base[count_column("Actual Weight (kgs)")]
+    base["Miles"] = base["Transport Distance (km)"] * KM_TO_MILES
+    return base
+
+
+def attach_emissions(base, factors=None):
+    # One vectorized join of the factor table onto the lane table, falling back
+    # to mode defaults, then emissions = ton-miles x g/ton-mile for every lane
+    keys = ["Carrier", "Mode"] if factors is not None and "Mode" in factors.columns else ["Carrier"]
+    if factors is not None:
+        joined = base.merge(factors, on=keys, how="left", validate="many_to_one")
+    else:
+        joined = base.assign(**{c: float("nan") for c in FACTOR_COLUMNS})
+    # Modes without a default of their own (e.g. LTL, Parcel) use the
+    # DEFAULT_MODE factors, so no lane is ever left without a factor
+    modes = joined["Mode"].astype(str)
+    mapped = modes.isin(DEFAULT_MODE_FACTORS.index)
+    defaults = DEFAULT_MODE_FACTORS.reindex(modes.where(mapped, DEFAULT_MODE)).to_numpy()
+    missing = joined[FACTOR_COLUMNS[0]].isna()
+    joined["Factor Source"] = "Carrier"
+    joined.loc[missing & mapped, "Factor Source"] = "Mode default"
+    joined.loc[missing & ~mapped, "Factor Source"] = f"{DEFAULT_MODE} default (unmapped mode)"
+    joined[FACTOR_COLUMNS] = joined[FACTOR_COLUMNS].fillna(pd.DataFrame(defaults, columns=FACTOR_COLUMNS, index=joined.index))
+    for pollutant, factor in zip(POLLUTANTS, FACTOR_COLUMNS):
+        joined[f"{pollutant} (kg)"] = joined["TON-MILE"] * joined[factor] / 1000
+    return joined
+
+
+def rollup(lanes, by):
+    # Sum the additive measures per key, then derive payload-weighted averages
+    # and effective g/ton-mile from those sums
+    emission_cols = [f"{p} (kg)" for p in POLLUTANTS]
+    sums = lanes.groupby(by, observed=True, sort=True)[
+        ["Rows", "TON-MILE", "TKM", "Payload (tons)", "Payload Rows", "Miles"] + emission_cols].sum()
+    out = pd.DataFrame(index=sums.index)
+    out["Shipments"] = sums["Rows"].astype("int64")
+    out["TON-MILE"] = sums["TON-MILE"]
+    out["TKM"] = sums["TKM"]
+    out["Miles"] = sums["Miles"]
+    # Shipments without a weight don't count toward the average payload
+    out["Avg Payload (tons)"] = sums["Payload (tons)"] / sums["Payload Rows"]
+    # Distance-weighted payload: ton-miles per mile travelled
+    out["Weighted Avg Payload (tons)"] = sums["TON-MILE"] / sums["Miles"]
+    for pollutant, col in zip(POLLUTANTS, emission_cols):
+        out[col] = sums[col]
+        out[f"{pollutant} (g/ton-mile)"] = sums[col] * 1000 / sums["TON-MILE"]
+    return out.round(3).reset_index()
+
+
+def smartway_report(summary, factors=None):
+    if summary.lanes is None:
+        return None
+    lanes = attach_emissions(lane_table(summary.lanes), factors)
+    return {
+        "Carrier": rollup(lanes, "Carrier"),
+        "Lane": rollup(lanes, "Route"),
+        "Mode": rollup(lanes, "Mode"),
+        "Carrier x Lane": rollup(lanes, ["Carrier", "Route", "Mode"]),
+    }
+
+
+def report_excel(carrier_totals, rollups=None):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        carrier_totals.to_excel(writer, sheet_name="Aggregated Data", index=False)
+        for level, table in (rollups or {}).items():
+            table.to_excel(writer, sheet_name=f"SmartWay {level}"[:31], index=False)
+    return output.getvalue()
+
+
+# Characters of 8pt Courier that fit across a landscape A4 page
+PDF_LINE_CHARS = 160
+
+
+def _column_blocks(table, keys, width=PDF_LINE_CHARS):
+    # Split a wide table into column groups that each fit on one line, with
+    # the key columns repeated in every group
+    keys = [k for k in keys if k in table.columns]
+    blocks, current = [], []
+    for col in [c for c in table.columns if c not in keys]:
+        text = table[keys + current + [col]].to_string(index=False)
+        if current and len(text.split("\n", 1)[0]) > width:
+            blocks.append(table[keys + current])
+            current = []
+        current.append(col)
+    if current or not blocks:
+        blocks.append(table[keys + current])
+    return blocks
+
+
+def report_pdf(carrier_totals, rollups=None):
+    # Tables are formatted in one vectorized to_string call per column group
+    # and written as monospaced blocks, instead of one FPDF cell per row.
+    # Wide rollups are split so every line fits a landscape page. The
+    # Carrier x Lane detail is left to the Excel report.
+    from fpdf import FPDF
+
+    from invoices import pdf_bytes
+
+    pdf = FPDF(orientation="L")
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, txt="Smartway Calculator Report", ln=True, align="C")
+    pdf.ln(10)
+    tables = {"TON-MILE & TKM by Carrier": carrier_totals[["Carrier", "TON-MILE", "TKM"]]}
+    tables.update({f"SmartWay by {level}": table for level, table in (rollups or {}).items() if level != "Carrier x Lane"})
+    for title, table in tables.items():
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, title, ln=True)
+        pdf.set_font("Courier", size=8)
+        for block in _column_blocks(table, keys=[table.columns[0]]):
+            pdf.multi_cell(0, 4, block.to_string(index=False))
+            pdf.ln(2)
+        pdf.ln(3)
+    return pdf_bytes(pdf)
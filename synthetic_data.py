@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+
+def make_fact_sales(n_rows, n_warehouses=3, start="2023-01-01", n_days=365, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit="D")
+    quantity = rng.integers(1, 7, n_rows)
+    unit_price = rng.choice([100, 150, 200], n_rows)
+    processing = rng.integers(1, 8, n_rows)
+    df = pd.DataFrame({
+        "SalesID": np.arange(1, n_rows + 1),
+        "Date": dates,
+        "ProductID": rng.integers(1, 4, n_rows),
+        "CustomerID": rng.integers(1, 11, n_rows),
+        "WarehouseID": rng.integers(1, n_warehouses + 1, n_rows),
+        "QuantitySold": quantity,
+        "UnitPrice": unit_price,
+        "ShippingCost": rng.uniform(5, 50, n_rows).round(2),
+        "OrderStatus": rng.choice(["Completed", "Pending", "Cancelled"], n_rows, p=[0.7, 0.19, 0.11]),
+        "TotalSales": quantity * unit_price,
+        "OrderPlacementDate": dates - pd.to_timedelta(processing, unit="D"),
+        "ProcessingTime": processing,
+    })
+    df["Month"] = df["Date"].dt.to_period("M").astype(str)
+    return df
+
+
+def make_shipments(n_rows, n_carriers=5, n_routes=20, seed=0):
+    # Columns match what shipments.summarize_shipments and the SmartWay
+    # report read: weights in kg, transport distance in km, billed Distance in miles
+    rng = np.random.default_rng(seed)
+    carriers = np.array([f"Carrier {i}" for i in range(1, n_carriers + 1)])
+    routes = np.array([f"Lane {i:03d}" for i in range(1, n_routes + 1)])
+    distance_km = rng.uniform(20, 2500, n_rows).round(1)
+    return pd.DataFrame({
+        "Carrier": pd.Categorical(carriers[rng.integers(0, n_carriers, n_rows)], categories=carriers),
+        "Route": pd.Categorical(routes[rng.integers(0, n_routes, n_rows)], categories=routes),
+        "Status": rng.choice(["Delivered", "In Transit", "Delayed"], n_rows, p=[0.8, 0.15, 0.05]),
+        "Actual Weight (kgs)": rng.uniform(50, 20000, n_rows).round(1),
+        "Transport Distance (km)": distance_km,
+        "Cost": (distance_km * rng.uniform(0.8, 2.5, n_rows)).round(2),
+        "Distance": (distance_km * 0.6213).round(1),
+    })
+
+
+def make_daily_sales(n_rows, n_warehouses=3, start="2021-01-01", n_days=3 * 365, seed=0):
+    # The app2.py upload layout: Date index, Sales, WarehouseID. History length
+    # is fixed; more rows mean more orders per day, as with a transaction export
+    rng = np.random.default_rng(seed)
+    day = rng.integers(0, n_days, n_rows)
+    season = 1 + 0.2 * np.sin(2 * np.pi * day / 365)
+    return pd.DataFrame({
+        "Sales": (rng.gamma(4, 250, n_rows) * season).round(2),
+        "WarehouseID": rng.integers(1, n_warehouses + 1, n_rows),
+    }, index=pd.DatetimeIndex(pd.Timestamp(start) + pd.to_timedelta(day, unit="D"), name="Date"))
+
+
+def make_invoices(n_invoices, n_items=3, seed=0):
+    # Invoice dicts in the shape invoice_batch.load_batch produces
+    rng = np.random.default_rng(seed)
+    invoices = []
+    for i in range(n_invoices):
+        quantity = rng.integers(1, 20, n_items)
+        price = rng.uniform(5, 500, n_items).round(2)
+        invoices.append({
+            "Sales Order No": f"SO-{i:06d}", "Date": "2024-01-15", "Bill To": f"Customer {i % 50}",
+            "Ship To": f"Customer {i % 50} Warehouse", "Importer of Record": "", "Special Instructions": "",
+            "Incoterms": "FOB", "Mode": "Ocean", "Freight Forwarder": "", "Total Weight": f"{quantity.sum() * 2} kg",
+            "Items": [
+                {"Description": f"Item {j}", "Quantity": int(q), "Unit Price": float(p), "Total Price": round(float(q * p), 2)}
+                for j, (q, p) in enumerate(zip(quantity, price))
+            ],
+        })
+    return invoices